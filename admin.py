@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
+from auth import user_cache, role_required
 from models import db, User
 from werkzeug.security import generate_password_hash
-import bcrypt
+from passwords import hash_password, check_password, needs_rehash
+from throttle import login_throttle
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -10,29 +12,55 @@ def create_admin_user():
     with db.session.begin():
         admin = User.query.filter_by(username="admin").first()
         if not admin:
-            hashed_password = bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            hashed_password = hash_password("admin123")
             new_admin = User(username="admin", password=hashed_password, role="admin")
             db.session.add(new_admin)
             db.session.commit()
             print("✅ Default Admin Created: admin / admin123")
 
+def too_many_attempts(retry_after):
+    response = jsonify({"error": "Too many login attempts", "retry_after": retry_after})
+    response.headers["Retry-After"] = str(retry_after)
+    return response, 429
+
 @admin_bp.route("/login", methods=["POST"])
 def login():
     """Admin & Employee Login Endpoint"""
     data = request.json
 
+    wait = login_throttle.retry_after(data.get("username"), request.remote_addr)
+    if wait:
+        print(f"❌ Login throttled for {data.get('username')} from {request.remote_addr}")
+        return too_many_attempts(wait)
+
     user = User.query.filter_by(username=data.get("username")).first()
 
     if not user:
         print("❌ User not found")
         return jsonify({"error": "Invalid credentials"}), 401
 
-    if not bcrypt.checkpw(data["password"].encode('utf-8'), user.password.encode('utf-8')):
-        print("❌ Incorrect password")
-        return jsonify({"error": "Invalid credentials"}), 401
+    # ✅ Cap concurrent bcrypt work so a login burst can't starve the rest of the worker
+    if not login_throttle.try_acquire_slot():
+        print("❌ Too many concurrent logins")
+        return too_many_attempts(1)
+    try:
+        # Hashing runs in a native thread pool so a login doesn't block the gevent hub
+        if not check_password(data["password"], user.password):
+            print("❌ Incorrect password")
+            return jsonify({"error": "Invalid credentials"}), 401
 
-    access_token = create_access_token(identity={"username": user.username, "role": user.role}, fresh=True)
-    refresh_token = create_refresh_token(identity={"username": user.username, "role": user.role})
+        # ✅ Upgrade hashes made with an older BCRYPT_ROUNDS while we have the plain password
+        if needs_rehash(user.password):
+            user.password = hash_password(data["password"])
+            db.session.commit()
+            print(f"✅ Password hash for {user.username} upgraded")
+    finally:
+        login_throttle.release_slot()
+
+    # The subject must be a string; the role travels as a claim so role checks need no query
+    claims = {"role": user.role}
+    access_token = create_access_token(identity=user.username, additional_claims=claims, fresh=True)
+    refresh_token = create_refresh_token(identity=user.username, additional_claims=claims)
 
     print("✅ Login successful")
     return jsonify({"access_token": access_token, "refresh_token": refresh_token, "role": user.role})
@@ -42,7 +70,7 @@ def login():
 def refresh_token():
     """Generate a new access token using the refresh token"""
     identity = get_jwt_identity()
-    new_access_token = create_access_token(identity=identity, fresh=False)
+    new_access_token = create_access_token(identity=identity, additional_claims={"role": get_jwt()["role"]}, fresh=False)
     return jsonify({"access_token": new_access_token})
 
 
@@ -60,10 +88,30 @@ def reset_password():
         return jsonify({"error": "User not found"}), 404
     
     # Hash the new password
-    hashed_new_password = bcrypt.hashpw(data["new_password"].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    hashed_new_password = hash_password(data["new_password"])
     
     # Update password in the database
     user.password = hashed_new_password
     db.session.commit()
+    user_cache.invalidate(user.username)
     
     return jsonify({"message": "Password reset successfully"}), 200
+
+@admin_bp.route("/users/<username>/role", methods=["PUT"])
+@role_required("admin")
+def change_role(username):
+    """Change a user's role (admins only)"""
+    data = request.json or {}
+    if data.get("role") not in ("admin", "user"):
+        return jsonify({"error": "role must be 'admin' or 'user'"}), 400
+
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    user.role = data["role"]
+    db.session.commit()
+    user_cache.invalidate(user.username)  # Tokens carrying the old role stop working on their next request, on every worker
+
+    print(f"✅ Role for {user.username} changed to {user.role}")
+    return jsonify({"message": "Role updated successfully"}), 200
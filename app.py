@@ -2,52 +2,156 @@ from flask import Flask, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
 from flask_cors import CORS
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask_migrate import Migrate
-from models import db, Product, Sale, Order, User, Category, Color
+from database import init_engine, read_only
+from models import db, Product, Sale, Order, User, Category, Color, SalesDailyRollup, order_product, RESERVED_ORDER_STATUSES
 from admin import admin_bp, create_admin_user
+from auth import register_user_lookup
+from throttle import login_throttle
+from best_sellers import best_sellers, WINDOWS as BEST_SELLER_WINDOWS
+from bulk_import import detect_format, import_products
+from catalog_cache import catalog_cache, cached_json
+from worker_sync import worker_sync
+from changes import changes_since
+from stock import (
+    StockError, apply_stock_adjustments, decrement_stock, decrement_stock_bulk, release_stock,
+    low_stock_filter, low_stock_tracker
+)
+from realtime import Broadcaster, queue_manager, DEFAULT_DEBOUNCE_SECONDS
+from rollup import record_sales, backfill as backfill_sales_rollup
+from sales import (
+    sale_filters, export_sales, keyset_sales_page, total_sales, parse_total_price, TOTAL_MODES,
+    encode_cursor, decode_cursor
+)
+from search import search_products, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from idempotency import idempotent
+from pagination import wants_page, wants_stream, keyset_page, stream_rows, InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from serializers import (
+    product_query, sale_query, serialize_product, serialize_inventory_item,
+    serialize_stock_level, serialize_low_stock_item, serialize_category, serialize_sale, serialize_orders
+)
 from flask_socketio import SocketIO 
 import json 
+import io
+import os
 
 
 app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///inventory.db"
+init_engine(app)  # DATABASE_URL (default sqlite:///inventory.db), pool options and SQLite pragmas
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["JWT_SECRET_KEY"] = "supersecretkey"
+# Cross-worker Socket.IO fan-out, e.g. redis://localhost:6379/0 (unset = single process)
+app.config["SOCKETIO_MESSAGE_QUEUE"] = os.environ.get("SOCKETIO_MESSAGE_QUEUE")
+app.config["SOCKETIO_CHANNEL"] = os.environ.get("SOCKETIO_CHANNEL", "beads-socketio")
+app.config["SOCKETIO_QUEUE_FOLDER"] = os.environ.get("SOCKETIO_QUEUE_FOLDER")
+# Coalescing window for stock/sale broadcasts per room; 0 sends every event at once
+app.config["SOCKETIO_DEBOUNCE_SECONDS"] = float(os.environ.get("SOCKETIO_DEBOUNCE_SECONDS", DEFAULT_DEBOUNCE_SECONDS))
+# bcrypt work factor; existing hashes are upgraded on the next successful login
+app.config["BCRYPT_ROUNDS"] = int(os.environ.get("BCRYPT_ROUNDS", 12))
+app.config["PASSWORD_HASH_THREADS"] = int(os.environ.get("PASSWORD_HASH_THREADS", 4))
+# Login throttling: attempts per username / per client IP, and concurrent password checks per worker
+app.config["LOGIN_USER_BURST"] = int(os.environ.get("LOGIN_USER_BURST", 5))
+app.config["LOGIN_USER_PER_MINUTE"] = float(os.environ.get("LOGIN_USER_PER_MINUTE", 5))
+app.config["LOGIN_IP_BURST"] = int(os.environ.get("LOGIN_IP_BURST", 20))
+app.config["LOGIN_IP_PER_MINUTE"] = float(os.environ.get("LOGIN_IP_PER_MINUTE", 20))
+app.config["LOGIN_MAX_CONCURRENT"] = int(os.environ.get("LOGIN_MAX_CONCURRENT", 8))
 
 db.init_app(app)
 migrate = Migrate(app, db)  
 jwt = JWTManager(app)
+register_user_lookup(jwt)
+login_throttle.init_app(app)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")  
+client_manager = queue_manager(
+    app.config["SOCKETIO_MESSAGE_QUEUE"], app.config["SOCKETIO_CHANNEL"], app.config["SOCKETIO_QUEUE_FOLDER"]
+)
+socketio = SocketIO(app, cors_allowed_origins="*", client_manager=client_manager)  
+if client_manager is not None:
+    worker_sync.attach(socketio.server)  # Cache bumps, low-stock state and best sellers reach every worker
+broadcaster = Broadcaster(socketio, app.config["SOCKETIO_DEBOUNCE_SECONDS"])
 
 app.register_blueprint(admin_bp, url_prefix="/admin")
 
 with app.app_context():
     create_admin_user() 
+    print(f"✅ Best seller counters warmed with {best_sellers.warm()} recent sales")
+    print(f"✅ Low stock tracker warmed with {low_stock_tracker.warm()} products")
+
+
+def alert_if_low(product_id, name, category_id, stock, low_stock_threshold):
+    """Publish low_stock_alert when this stock level takes a product below its threshold (once per crossing)"""
+    if low_stock_tracker.update(product_id, stock, low_stock_threshold):
+        broadcaster.publish("low_stock_alert", {
+            "id": product_id, "name": name,
+            "stock": stock,
+            "message": f"⚠️ Low Stock: {name} has only {stock} left!"
+        }, product_ids=[product_id], category_ids=[category_id])
+
 @app.route("/", methods=["GET"])
 def home():
     return jsonify({"message": "Beads Inventory Management API Running!"})
 
 
 @app.route("/products", methods=["GET"])
+@read_only
 def get_products():
-    """Get all products"""
+    """Get all products
+
+    Supports keyset pagination (?limit=&cursor=) and streaming (?stream=ndjson|json).
+    Non-streamed responses are served from the catalog cache with an ETag.
+    """
     print("📩 Received GET /products request")  # ✅ Debugging
 
-    try:
-        products = Product.query.all()
-        response = [{
-            "id": p.id, "name": p.name, "category": p.category.name,
-            "stock": p.stock_quantity, "price": p.selling_price
-        } for p in products]
+    def build():
+        if wants_page():
+            page = keyset_page(product_query(), Product.id, serialize_product)
+            print(f"✅ Returning {len(page['items'])} products (next cursor: {page['next_cursor']})")
+            return page
 
-        print("✅ Returning Products:", response)
-        return jsonify(response)
+        products = product_query().all()
+        print(f"✅ Returning {len(products)} products")
+        return [serialize_product(p) for p in products]
+
+    try:
+        stream_format = wants_stream()
+        if stream_format:
+            return stream_rows(product_query(), Product.id, serialize_product, stream_format)
+        return cached_json(build)
+    except InvalidCursor as e:
+        print(f"❌ {str(e)}")
+        return jsonify({"error": "Invalid cursor"}), 400
     except Exception as e:
         print("❌ Error in /products:", str(e))
         return jsonify({"error": "Server error"}), 500
 
+@app.route("/products/search", methods=["GET"])
+@read_only
+def search_products_endpoint():
+    """Full-text product search over name, size and category (?q=&limit=)
+
+    Words are prefix-matched for type-ahead and results are ranked best first.
+    """
+    q = request.args.get("q", "").strip()
+    print(f"📩 Received GET /products/search request: q={q!r}")
+
+    if not q:
+        return jsonify({"error": "Missing search query: q"}), 400
+
+    limit = request.args.get("limit", DEFAULT_SEARCH_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+
+    def build():
+        results = search_products(q, limit)
+        print(f"✅ Returning {len(results)} search results for {q!r}")
+        return [serialize_product(p) for p in results]
+
+    try:
+        return cached_json(build)
+    except Exception as e:
+        print(f"❌ Error in /products/search: {str(e)}")
+        return jsonify({"error": "Server error", "details": str(e)}), 500
+
 @app.route("/products/<int:id>", methods=["GET"])
 @jwt_required()
 def get_product(id):
@@ -56,10 +160,7 @@ def get_product(id):
     if not product:
         return jsonify({"error": "Product not found"}), 404
 
-    return jsonify({
-        "id": product.id, "name": product.name, "category": product.category,
-        "stock": product.stock_quantity, "price": product.selling_price
-    })
+    return jsonify(serialize_product(product))
 
 @app.route("/products", methods=["POST"]) 
 def add_product():
@@ -90,6 +191,7 @@ def add_product():
 
         db.session.add(new_product)
         db.session.commit()
+        catalog_cache.bump()
         print("✅ Product added successfully!")
         return jsonify({"message": "Product added successfully"}), 201
 
@@ -101,6 +203,42 @@ def add_product():
         print(f"❌ Unexpected Server Error: {str(e)}")
         return jsonify({"error": "Server error", "details": str(e)}), 500
 
+@app.route("/products/bulk", methods=["POST"])
+def bulk_add_products():
+    """Bulk import products from a CSV or NDJSON upload
+
+    Accepts a multipart `file` field or a raw text/csv / application/x-ndjson
+    body. Invalid rows are reported per row and skipped; valid rows are inserted
+    in batches.
+    """
+    print("📩 Received POST /products/bulk request")
+
+    upload = request.files.get("file")
+    if upload:
+        stream, fmt = upload.stream, detect_format(upload.filename, upload.mimetype, request.args.get("format"))
+    else:
+        stream, fmt = io.BufferedReader(request.stream), detect_format(None, request.mimetype, request.args.get("format"))
+
+    if fmt is None:
+        return jsonify({"error": "Unsupported format. Upload CSV or NDJSON, or pass ?format=csv|ndjson"}), 415
+
+    try:
+        summary = import_products(stream, fmt)
+    except UnicodeDecodeError as e:
+        db.session.rollback()
+        print(f"❌ Bulk import is not valid UTF-8: {str(e)}")
+        return jsonify({"error": "File must be UTF-8 encoded", "details": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Unexpected Server Error: {str(e)}")
+        return jsonify({"error": "Server error", "details": str(e)}), 500
+
+    if summary["inserted"]:
+        catalog_cache.bump()
+
+    print(f"✅ Bulk import finished: {summary['inserted']} inserted, {summary['failed']} failed")
+    return jsonify(summary), 201 if summary["inserted"] else 400
+
 
 @app.route("/products/<int:id>", methods=["PUT"])
 @jwt_required()
@@ -119,6 +257,8 @@ def update_product(id):
     product.selling_price = data.get("selling_price", product.selling_price)
 
     db.session.commit()
+    catalog_cache.bump()
+    alert_if_low(product.id, product.name, product.category_id, product.stock_quantity, product.low_stock_threshold)
     return jsonify({"message": "Product updated successfully"})
 
 @app.route("/products/<int:id>", methods=["DELETE"])
@@ -131,37 +271,34 @@ def delete_product(id):
 
     db.session.delete(product)
     db.session.commit()
+    catalog_cache.bump()
+    low_stock_tracker.discard(id)
     return jsonify({"message": "Product deleted successfully"})
 
 @app.route("/products/category/<int:category_id>", methods=["GET"])
 def get_products_by_category(category_id):
-    """Get products filtered by category"""
+    """Get products filtered by category (served from the catalog cache with an ETag)"""
     print(f"📩 Received GET /products/category/{category_id} request")
-    
-    try:
+
+    def build():
         category = Category.query.get(category_id)
         if not category:
             print(f"❌ Category not found: ID {category_id}")
-            return jsonify({"error": "Category not found"}), 404
+            return {"error": "Category not found"}, 404
             
         # Query products belonging to this category
-        products = Product.query.filter_by(category_id=category_id).all()
+        products = product_query().filter_by(category_id=category_id).all()
         
         if not products:
             print(f"ℹ️ No products found for category ID {category_id}")
-            return jsonify([]), 200
+            return []
             
-        # Format the response similar to existing /products route
-        response = [{
-            "id": p.id,
-            "name": p.name,
-            "category": p.category.name,
-            "stock": p.stock_quantity,
-            "price": p.selling_price
-        } for p in products]
-        
         print(f"✅ Returning {len(products)} products for category {category.name}")
-        return jsonify(response), 200
+        # Format the response similar to existing /products route
+        return [serialize_product(p) for p in products]
+
+    try:
+        return cached_json(build)
     except Exception as e:
         print(f"❌ Error in /products/category/{category_id}: {str(e)}")
         return jsonify({"error": "Server error", "details": str(e)}), 500
@@ -169,23 +306,83 @@ def get_products_by_category(category_id):
 # ================== STOCK MANAGEMENT ==================
 @app.route("/inventory", methods=["GET"])
 @jwt_required()  # ✅ Ensure authentication
+@read_only
 def get_inventory():
-    """Fetch inventory data"""
+    """Fetch inventory data
+
+    Supports keyset pagination (?limit=&cursor=) and streaming (?stream=ndjson|json).
+    """
     try:
         print("\n📩 Incoming request for inventory data")
 
+        stream_format = wants_stream()
+        if stream_format:
+            return stream_rows(Product.query, Product.id, serialize_inventory_item, stream_format)
+        if wants_page():
+            return jsonify(keyset_page(Product.query, Product.id, serialize_inventory_item)), 200
+
         inventory = Product.query.all()
-        inventory_data = [
-            {"id": item.id, "name": item.name, "stock_quantity": item.stock_quantity} for item in inventory
-        ]
+        inventory_data = [serialize_inventory_item(item) for item in inventory]
 
         print("✅ Sending inventory data:", inventory_data)
         return jsonify(inventory_data), 200
 
+    except InvalidCursor as e:
+        print(f"❌ {str(e)}")
+        return jsonify({"error": "Invalid cursor"}), 400
     except Exception as e:
         print("❌ Error fetching inventory:", str(e))
         return jsonify({"error": "Server error", "details": str(e)}), 500
 
+@app.route("/inventory/changes", methods=["GET"])
+@jwt_required()
+@read_only
+def get_inventory_changes():
+    """Inventory rows changed or deleted since ?since=<seq> (delta sync for reconnecting clients)
+
+    Returns {"changes", "deleted", "since", "has_more"}; send "since" back on the next call.
+    """
+    since = request.args.get("since", 0, type=int)
+    limit = max(1, min(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    try:
+        print(f"📩 Received GET /inventory/changes request since {since}")
+        return jsonify(changes_since(since, limit)), 200
+    except Exception as e:
+        print(f"❌ Error fetching inventory changes: {str(e)}")
+        return jsonify({"error": "Server error", "details": str(e)}), 500
+
+@app.route("/inventory/low-stock", methods=["GET"])
+@jwt_required()
+@read_only
+def get_low_stock():
+    """Products below their low-stock threshold, lowest stock first
+
+    Read from the ix_product_low_stock partial index, so the cost follows the
+    number of low products rather than the catalog size. Supports keyset
+    pagination (?limit=&cursor=) in the same (stock_quantity, id) order, which
+    the index serves directly, and the catalog cache.
+    """
+    print("📩 Received GET /inventory/low-stock request")
+    order = (Product.stock_quantity, Product.id)
+
+    def build():
+        query = product_query().filter(low_stock_filter())
+        if wants_page():
+            return keyset_page(query, order, serialize_low_stock_item)
+
+        products = query.order_by(*order).all()
+        print(f"✅ Returning {len(products)} low stock products")
+        return [serialize_low_stock_item(p) for p in products]
+
+    try:
+        return cached_json(build)
+    except InvalidCursor as e:
+        print(f"❌ {str(e)}")
+        return jsonify({"error": "Invalid cursor"}), 400
+    except Exception as e:
+        print(f"❌ Error fetching low stock products: {str(e)}")
+        return jsonify({"error": "Server error", "details": str(e)}), 500
+
 @app.route("/inventory/<int:id>/stock", methods=["PATCH"])
 @jwt_required()
 def update_stock(id):
@@ -198,6 +395,8 @@ def update_stock(id):
 
     product.stock_quantity += data["quantity"]
     db.session.commit()
+    catalog_cache.bump()
+    alert_if_low(product.id, product.name, product.category_id, product.stock_quantity, product.low_stock_threshold)
     return jsonify({"message": "Stock updated successfully"})
 
 @app.route("/inventory/update", methods=["POST"])
@@ -211,25 +410,71 @@ def update_inventory():
 
     product.stock_quantity = data["stock"]
     db.session.commit()
+    catalog_cache.bump()
 
-    # ✅ Notify all clients about stock updates
-    socketio.emit("stock_update", {
+    # ✅ Notify clients watching this product or its category about stock updates
+    broadcaster.publish("stock_update", {
         "id": product.id, "name": product.name,
         "stock": product.stock_quantity
-    })
+    }, product_ids=[product.id], category_ids=[product.category_id])
 
-    # ✅ Emit a low stock alert if stock is below 10
-    if product.stock_quantity < 10:
-        socketio.emit("low_stock_alert", {
-            "id": product.id, "name": product.name,
-            "stock": product.stock_quantity,
-            "message": f"⚠️ Low Stock: {product.name} has only {product.stock_quantity} left!"
-        })
+    # ✅ Emit a low stock alert if stock just dropped below the product's threshold
+    alert_if_low(product.id, product.name, product.category_id, product.stock_quantity, product.low_stock_threshold)
 
     return jsonify({"message": "Stock updated successfully"}), 200
 
+@app.route("/inventory/batch", methods=["POST"])
+@jwt_required()
+def batch_update_inventory():
+    """Apply many stock adjustments in one transaction & notify clients once
+
+    Body: {"adjustments": [{"id": 1, "delta": -3}, {"id": 2, "stock": 40}, ...]}
+    Clients get one stock_update event {"updates": [{"id", "name", "stock"}, ...]}
+    and at most one low_stock_alert event {"alerts": [...]}; the "updates" /
+    "alerts" key tells a batch apart from a single-product message.
+    """
+    data = request.json
+    if not data or not isinstance(data.get("adjustments"), list):
+        return jsonify({"error": "Missing field: adjustments"}), 400
+
+    print(f"📩 Received POST /inventory/batch request with {len(data['adjustments'])} adjustments")
+
+    try:
+        rows = apply_stock_adjustments(data["adjustments"])
+        db.session.commit()
+    except StockError as e:
+        db.session.rollback()
+        print(f"❌ Batch stock update rejected: {str(e)}")
+        return jsonify(e.payload), e.status
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Database error during batch stock update: {str(e)}")
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+
+    catalog_cache.bump()
+
+    # ✅ One aggregated event for the whole batch instead of one per product
+    updates = [{"id": row.id, "name": row.name, "stock": row.stock_quantity} for row in rows]
+    broadcaster.publish("stock_update", {"updates": updates},
+                        product_ids=[row.id for row in rows], category_ids=[row.category_id for row in rows])
+
+    # ✅ One alert list, with each product that just became low listed once
+    low_rows = [row for row in rows if low_stock_tracker.update(row.id, row.stock_quantity, row.low_stock_threshold)]
+    alerts = [{
+        "id": row.id, "name": row.name,
+        "stock": row.stock_quantity,
+        "message": f"⚠️ Low Stock: {row.name} has only {row.stock_quantity} left!"
+    } for row in low_rows]
+    if alerts:
+        broadcaster.publish("low_stock_alert", {"alerts": alerts},
+                            product_ids=[row.id for row in low_rows], category_ids=[row.category_id for row in low_rows])
+
+    print(f"✅ Batch stock update applied to {len(updates)} products ({len(alerts)} low stock)")
+    return jsonify({"message": "Stock updated successfully", "updated": len(updates), "low_stock": len(alerts)}), 200
+
 # ================== SALES MANAGEMENT ==================
 @app.route("/sales", methods=["POST"])
+@idempotent
 def create_sale():
     """Record a sale with improved error handling and stock management"""
     print("📩 Received POST /sales request")
@@ -246,6 +491,16 @@ def create_sale():
             if field not in data:
                 print(f"❌ Missing field: {field}")
                 return jsonify({"error": f"Missing field: {field}"}), 400
+
+        if not isinstance(data["quantity_sold"], int) or data["quantity_sold"] <= 0:
+            print(f"❌ Invalid quantity_sold: {data['quantity_sold']}")
+            return jsonify({"error": "quantity_sold must be a positive integer"}), 400
+
+        try:
+            total_price = parse_total_price(data["total_price"])
+        except ValueError as ve:
+            print(f"❌ {str(ve)}")
+            return jsonify({"error": "total_price must be a number"}), 400
                 
         # Check if product exists
         product = Product.query.get(data["product_id"])
@@ -253,46 +508,46 @@ def create_sale():
             print(f"❌ Product not found: ID {data['product_id']}")
             return jsonify({"error": "Product not found"}), 404
             
-        # Check if sufficient stock is available
-        if product.stock_quantity < data["quantity_sold"]:
-            print(f"❌ Insufficient stock for product {product.name}: {product.stock_quantity} available, {data['quantity_sold']} requested")
-            return jsonify({
-                "error": "Insufficient stock", 
-                "available": product.stock_quantity,
-                "requested": data["quantity_sold"]
-            }), 400
-            
         try:
-            # Start transaction
-            product.stock_quantity -= data["quantity_sold"]
+            # Check and decrement stock in one conditional UPDATE so concurrent sales can't oversell
+            remaining_stock = decrement_stock(product.id, data["quantity_sold"])
+            if remaining_stock is None:
+                db.session.rollback()
+                available = db.session.scalar(db.select(Product.stock_quantity).where(Product.id == product.id))
+                print(f"❌ Insufficient stock for product {product.name}: {available} available, {data['quantity_sold']} requested")
+                return jsonify({
+                    "error": "Insufficient stock", 
+                    "available": available,
+                    "requested": data["quantity_sold"]
+                }), 400
+
+            sale_date = datetime.utcnow()
             sale = Sale(
                 product_id=data["product_id"], 
                 quantity_sold=data["quantity_sold"],
-                total_price=data["total_price"], 
+                sale_date=sale_date,
+                total_price=total_price, 
                 payment_method=data["payment_method"],
                 sale_status=data["sale_status"]
             )
             db.session.add(sale)
+            record_sales([(product.id, sale_date.date(), data["quantity_sold"], total_price)])
             db.session.commit()
+            catalog_cache.bump()
+            best_sellers.record(product.id, data["quantity_sold"], total_price, product.name, sale_date)
             
             # Notify clients about the sale and updated stock
-            socketio.emit("sale_completed", {
+            broadcaster.publish("sale_completed", {
                 "id": sale.id,
                 "product_id": product.id,
                 "product_name": product.name,
                 "quantity_sold": data["quantity_sold"],
-                "total_price": data["total_price"],
-                "remaining_stock": product.stock_quantity
-            })
+                "total_price": total_price,
+                "remaining_stock": remaining_stock
+            }, product_ids=[product.id], category_ids=[product.category_id])
             
-            # Emit low stock alert if needed
-            if product.stock_quantity < product.low_stock_threshold:
-                socketio.emit("low_stock_alert", {
-                    "id": product.id, 
-                    "name": product.name,
-                    "stock": product.stock_quantity,
-                    "message": f"⚠️ Low Stock: {product.name} has only {product.stock_quantity} left!"
-                })
+            # Emit low stock alert if this sale crossed the threshold
+            alert_if_low(product.id, product.name, product.category_id, remaining_stock, product.low_stock_threshold)
                 
             print(f"✅ Sale recorded successfully: {data['quantity_sold']} units of product {product.name}")
             return jsonify({"message": "Sale recorded successfully", "sale_id": sale.id}), 201
@@ -307,6 +562,109 @@ def create_sale():
         print(f"❌ Unexpected error in /sales POST: {str(e)}")
         return jsonify({"error": "Server error", "details": str(e)}), 500
 
+@app.route("/sales/checkout", methods=["POST"])
+@idempotent
+def checkout():
+    """Record every line of a basket atomically
+
+    Body: {"items": [{"product_id", "quantity_sold", "total_price"}, ...],
+           "payment_method", "sale_status"}
+    Stock for all lines is taken with bulk conditional UPDATEs and the sales are
+    written in one commit, so a basket is either fully recorded or not at all.
+    """
+    print("📩 Received POST /sales/checkout request")
+
+    data = request.json
+    if not data:
+        print("❌ Error: No JSON data received")
+        return jsonify({"error": "No data provided"}), 400
+
+    for field in ["items", "payment_method", "sale_status"]:
+        if field not in data:
+            print(f"❌ Missing field: {field}")
+            return jsonify({"error": f"Missing field: {field}"}), 400
+
+    items = data["items"]
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "items must be a non-empty list"}), 400
+
+    quantities = {}
+    for index, item in enumerate(items):
+        missing = [f for f in ["product_id", "quantity_sold", "total_price"] if not isinstance(item, dict) or f not in item]
+        if missing:
+            return jsonify({"error": "Missing line field(s)", "missing": missing, "index": index}), 400
+        if not isinstance(item["product_id"], int) or isinstance(item["product_id"], bool):
+            return jsonify({"error": "product_id must be an integer", "index": index}), 400
+        if not isinstance(item["quantity_sold"], int) or item["quantity_sold"] <= 0:
+            return jsonify({"error": "quantity_sold must be a positive integer", "index": index}), 400
+        try:
+            item["total_price"] = parse_total_price(item["total_price"])
+        except ValueError:
+            return jsonify({"error": "total_price must be a number", "index": index}), 400
+        quantities[item["product_id"]] = quantities.get(item["product_id"], 0) + item["quantity_sold"]
+
+    try:
+        # Plain rows rather than ORM objects, so nothing is reloaded after the commit
+        products = {p.id: p for p in db.session.execute(
+            db.select(Product.id, Product.name, Product.category_id, Product.low_stock_threshold)
+            .where(Product.id.in_(quantities))
+        )}
+        missing = [product_id for product_id in quantities if product_id not in products]
+        if missing:
+            print(f"❌ Products not found: {missing}")
+            return jsonify({"error": "Product not found", "missing": missing}), 404
+
+        remaining = decrement_stock_bulk(quantities)
+        # One multi-row INSERT for the basket, ids returned in line order
+        sale_date = datetime.utcnow()
+        sale_ids = db.session.scalars(
+            db.insert(Sale).returning(Sale.id, sort_by_parameter_order=True),
+            [{
+                "product_id": item["product_id"],
+                "quantity_sold": item["quantity_sold"],
+                "sale_date": sale_date,
+                "total_price": item["total_price"],
+                "payment_method": data["payment_method"],
+                "sale_status": data["sale_status"]
+            } for item in items]
+        ).all()
+        record_sales((item["product_id"], sale_date.date(), item["quantity_sold"], item["total_price"]) for item in items)
+        db.session.commit()
+    except StockError as e:
+        db.session.rollback()
+        print(f"❌ Checkout rejected: {str(e)}")
+        return jsonify(e.payload), e.status
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Database error during checkout: {str(e)}")
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+
+    catalog_cache.bump()
+    for item in items:
+        best_sellers.record(item["product_id"], item["quantity_sold"], item["total_price"],
+                            products[item["product_id"]].name, sale_date)
+
+    # ✅ One event for the whole basket
+    broadcaster.publish("sale_completed", {
+        "sale_ids": sale_ids,
+        "total_price": sum(item["total_price"] for item in items),
+        "items": [{
+            "id": sale_id,
+            "product_id": item["product_id"],
+            "product_name": products[item["product_id"]].name,
+            "quantity_sold": item["quantity_sold"],
+            "total_price": item["total_price"],
+            "remaining_stock": remaining[item["product_id"]]
+        } for sale_id, item in zip(sale_ids, items)]
+    }, product_ids=list(products), category_ids=[p.category_id for p in products.values()])
+
+    for product_id, stock_left in remaining.items():
+        product = products[product_id]
+        alert_if_low(product.id, product.name, product.category_id, stock_left, product.low_stock_threshold)
+
+    print(f"✅ Checkout recorded: {len(sale_ids)} lines")
+    return jsonify({"message": "Checkout recorded successfully", "sale_ids": sale_ids}), 201
+
 @app.route("/sales", methods=["GET"])
 def get_sales():
     """Retrieve sales history"""
@@ -427,8 +785,15 @@ def get_sale_details(sale_id):
         return jsonify({"error": "Server error", "details": str(e)}), 500
 
 @app.route("/sales/all", methods=["GET"])
+@read_only
 def get_all_sales():
-    """Retrieve all sales with filtering, pagination and product details"""
+    """Retrieve all sales with filtering, pagination and product details
+
+    Two paging modes:
+    - ?page=N (default): OFFSET paging with an exact total.
+    - ?cursor=<token> (empty for the first page): keyset paging on (sale_date, id),
+      constant cost per page. Totals are opt-in with ?total=exact|cached|estimate.
+    """
     print("📩 Received GET /sales/all request")
     
     try:
@@ -436,9 +801,8 @@ def get_all_sales():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         
-        # Limit per_page to reasonable values
-        if per_page > 100:
-            per_page = 100
+        # Limit per_page to reasonable values (at least one row, or a cursor page has no last row)
+        per_page = max(1, min(per_page, 100))
         
         # Get filter parameters
         start_date = request.args.get('start_date')
@@ -451,79 +815,51 @@ def get_all_sales():
               f"payment_method={payment_method}, sale_status={sale_status}")
         print(f"📄 Pagination: page={page}, per_page={per_page}")
         
-        # Build the query with filters
-        query = Sale.query
-        
-        # Apply filters if provided
-        if start_date:
-            try:
-                start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
-                query = query.filter(Sale.sale_date >= start_datetime)
-            except ValueError:
-                print(f"❌ Invalid start_date format: {start_date}")
-                return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
-                
-        if end_date:
+        # Build the query with filters (product and category are joined in, not lazy-loaded per row)
+        try:
+            conditions = sale_filters(request.args)
+        except ValueError as ve:
+            print(f"❌ {str(ve)}")
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        query = sale_query().filter(*conditions)
+
+        if "cursor" in request.args:
+            total_mode = request.args.get("total", "none")
+            if total_mode not in TOTAL_MODES:
+                return jsonify({"error": f"Invalid total mode. Use one of: {', '.join(TOTAL_MODES)}"}), 400
+
             try:
-                # Add one day to include the end date fully
-                end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
-                end_datetime = datetime(end_datetime.year, end_datetime.month, end_datetime.day)
-                query = query.filter(Sale.sale_date <= end_datetime)
-            except ValueError:
-                print(f"❌ Invalid end_date format: {end_date}")
-                return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
-                
-        if product_id:
-            query = query.filter_by(product_id=product_id)
-            
-        if payment_method:
-            query = query.filter_by(payment_method=payment_method)
-            
-        if sale_status:
-            query = query.filter_by(sale_status=sale_status)
+                sales, next_cursor = keyset_sales_page(query, request.args["cursor"], per_page)
+            except ValueError as ve:
+                print(f"❌ {str(ve)}")
+                return jsonify({"error": "Invalid cursor"}), 400
+
+            filter_key = tuple(sorted((k, v) for k, v in request.args.items() if k not in ("cursor", "per_page", "total")))
+            response = {
+                "sales": [serialize_sale(sale) for sale in sales],
+                "pagination": {
+                    "per_page": per_page,
+                    "has_next": next_cursor is not None,
+                    "next_cursor": next_cursor,
+                    "total_items": total_sales(conditions, total_mode, filter_key),
+                    "total_mode": total_mode
+                }
+            }
+            print(f"✅ Returning {len(sales)} sales (cursor page)")
+            return jsonify(response), 200
         
         # Order by most recent sales first
-        query = query.order_by(Sale.sale_date.desc())
-        
-        # Get total count before pagination
-        total_count = query.count()
+        query = query.order_by(Sale.sale_date.desc(), Sale.id)
         
-        # Apply pagination
+        # Apply pagination (paginate() runs the single COUNT for the total)
         paginated_sales = query.paginate(page=page, per_page=per_page, error_out=False)
         
         # Format the response
-        sales_list = []
-        for sale in paginated_sales.items:
-            # Get associated product
-            product = Product.query.get(sale.product_id)
-            
-            # Calculate unit price and profit
-            unit_price = sale.total_price / sale.quantity_sold if sale.quantity_sold > 0 else 0
-            profit = sale.total_price - (product.selling_price * sale.quantity_sold) if product else 0
-            
-            sale_data = {
-                "id": sale.id,
-                "sale_date": sale.sale_date,
-                "quantity_sold": sale.quantity_sold,
-                "total_price": sale.total_price,
-                "payment_method": sale.payment_method,
-                "sale_status": sale.sale_status,
-                "unit_price": unit_price,
-                "profit": profit,
-                "product": {
-                    "id": product.id,
-                    "name": product.name,
-                    "category_id": product.category_id,
-                    "category_name": product.category.name if product.category else None,
-                    "selling_price": product.selling_price,
-                    "stock_quantity": product.stock_quantity
-                } if product else None
-            }
-            sales_list.append(sale_data)
+        sales_list = [serialize_sale(sale) for sale in paginated_sales.items]
         
         # Prepare pagination info
         pagination = {
-            "total_items": total_count,
+            "total_items": paginated_sales.total,
             "total_pages": paginated_sales.pages,
             "current_page": page,
             "per_page": per_page,
@@ -545,45 +881,219 @@ def get_all_sales():
         print(f"❌ Error in /sales/all: {str(e)}")
         return jsonify({"error": "Server error", "details": str(e)}), 500
 
+@app.route("/sales/export", methods=["GET"])
+@jwt_required()
+def export_sales_endpoint():
+    """Stream all sales matching the /sales/all filters as CSV or NDJSON (?format=csv|ndjson)
+
+    The whole range comes back in one streamed response instead of pages.
+    """
+    print(f"📩 Received GET /sales/export request: {dict(request.args)}")
+
+    fmt = request.args.get("format", "csv")
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "Invalid format. Use csv or ndjson"}), 400
+
+    try:
+        conditions = sale_filters(request.args)
+    except ValueError as ve:
+        print(f"❌ {str(ve)}")
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+    response = export_sales(conditions, fmt)
+    filename = f"sales_{request.args.get('start_date', 'all')}_{request.args.get('end_date', 'all')}.{fmt}"
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
 # ================== ORDER MANAGEMENT ==================
 @app.route("/orders", methods=["POST"])
 @jwt_required()
+@idempotent
 def create_order():
-    """Create a customer order"""
+    """Create a customer order and reserve stock for its line items
+
+    Body: {"customer_name", "order_status", "shipping_info",
+           "items": [{"product_id", "quantity"}, ...]}
+    Stock for every line is reserved with bulk conditional UPDATEs and the lines
+    are written to order_product with one executemany, all in one transaction.
+    """
+    print("📩 Received POST /orders request")
+
     data = request.json
-    order = Order(
-        customer_name=data["customer_name"], products_ordered=data["products_ordered"],
-        order_status=data["order_status"], shipping_info=data["shipping_info"]
-    )
-    db.session.add(order)
-    db.session.commit()
-    return jsonify({"message": "Order created successfully"}), 201
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    for field in ["customer_name", "order_status", "shipping_info", "items"]:
+        if field not in data:
+            print(f"❌ Missing field: {field}")
+            return jsonify({"error": f"Missing field: {field}"}), 400
+
+    items = data["items"]
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "items must be a non-empty list"}), 400
+
+    # Lines for the same product are merged (order_product is keyed by order and product)
+    quantities = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or "product_id" not in item:
+            return jsonify({"error": "Missing line field: product_id", "index": index}), 400
+        if not isinstance(item["product_id"], int) or isinstance(item["product_id"], bool):
+            return jsonify({"error": "product_id must be an integer", "index": index}), 400
+        quantity = item.get("quantity", 1)
+        if not isinstance(quantity, int) or quantity <= 0:
+            return jsonify({"error": "quantity must be a positive integer", "index": index}), 400
+        quantities[item["product_id"]] = quantities.get(item["product_id"], 0) + quantity
+
+    try:
+        products = {p.id: p for p in db.session.execute(
+            db.select(Product.id, Product.name, Product.category_id, Product.low_stock_threshold)
+            .where(Product.id.in_(quantities))
+        )}
+        missing = [product_id for product_id in quantities if product_id not in products]
+        if missing:
+            print(f"❌ Products not found: {missing}")
+            return jsonify({"error": "Product not found", "missing": missing}), 404
+
+        remaining = decrement_stock_bulk(quantities)
+
+        order = Order(
+            customer_name=data["customer_name"], order_status=data["order_status"],
+            shipping_info=data["shipping_info"]
+        )
+        db.session.add(order)
+        db.session.flush()
+        order_id = order.id
+
+        db.session.execute(order_product.insert(), [
+            {"order_id": order_id, "product_id": product_id, "quantity": quantity}
+            for product_id, quantity in quantities.items()
+        ])
+        db.session.commit()
+    except StockError as e:
+        db.session.rollback()
+        print(f"❌ Order rejected: {str(e)}")
+        return jsonify(e.payload), e.status
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Database error creating order: {str(e)}")
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+
+    catalog_cache.bump()
+    for product_id, stock_left in remaining.items():
+        product = products[product_id]
+        alert_if_low(product.id, product.name, product.category_id, stock_left, product.low_stock_threshold)
+
+    print(f"✅ Order {order_id} created with {len(quantities)} lines")
+    return jsonify({"message": "Order created successfully", "order_id": order_id}), 201
+
+@app.route("/orders/<int:id>/cancel", methods=["POST"])
+@jwt_required()
+def cancel_order(id):
+    """Cancel an order and release its reserved stock
+
+    Only orders whose stock is still reserved (RESERVED_ORDER_STATUSES) can be
+    cancelled; a completed or shipped order's stock has left and is not put back.
+    """
+    try:
+        # Conditional status flip: only the first cancel of a reserving order releases stock
+        cancelled = db.session.execute(
+            db.update(Order)
+            .where(Order.id == id, db.or_(Order.order_status.in_(RESERVED_ORDER_STATUSES),
+                                          Order.order_status.is_(None)))
+            .values(order_status="cancelled")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not cancelled:
+            db.session.rollback()
+            order = db.session.get(Order, id)
+            if not order:
+                return jsonify({"error": "Order not found"}), 404
+            if order.order_status == "cancelled":
+                return jsonify({"error": "Order is already cancelled"}), 409
+            return jsonify({"error": f"Order is {order.order_status} and can no longer be cancelled"}), 409
+
+        lines = db.session.execute(
+            db.select(order_product.c.product_id, order_product.c.quantity).where(order_product.c.order_id == id)
+        ).all()
+        released = release_stock(dict(lines))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Database error cancelling order {id}: {str(e)}")
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+
+    catalog_cache.bump()
+    for row in released:
+        alert_if_low(row.id, row.name, row.category_id, row.stock_quantity, row.low_stock_threshold)
+
+    print(f"✅ Order {id} cancelled, {len(lines)} reservations released")
+    return jsonify({"message": "Order cancelled successfully"}), 200
 
 @app.route("/orders", methods=["GET"])
 @jwt_required()
 def get_orders():
-    """Retrieve all customer orders"""
-    orders = Order.query.all()
-    return jsonify([{
-        "id": o.id, "customer_name": o.customer_name, "products_ordered": o.products_ordered,
-        "order_status": o.order_status, "order_date": o.order_date
-    } for o in orders])
+    """Retrieve customer orders, newest first, with their line items
+
+    Filters: ?order_status=, ?start_date=&end_date= (YYYY-MM-DD, on order_date).
+    Keyset paging on (order_date, id): ?per_page= and ?cursor= from next_cursor.
+    """
+    print("📩 Received GET /orders request")
+
+    try:
+        per_page = max(1, min(request.args.get("per_page", 20, type=int), 100))
+        query = Order.query
+
+        if request.args.get("order_status"):
+            query = query.filter(Order.order_status == request.args["order_status"])
+
+        try:
+            if request.args.get("start_date"):
+                query = query.filter(Order.order_date >= datetime.strptime(request.args["start_date"], "%Y-%m-%d"))
+            if request.args.get("end_date"):
+                # Half-open range so the order_date indexes can be used
+                end_datetime = datetime.strptime(request.args["end_date"], "%Y-%m-%d") + timedelta(days=1)
+                query = query.filter(Order.order_date < end_datetime)
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+        if request.args.get("cursor"):
+            try:
+                last_date, last_id = decode_cursor(request.args["cursor"])
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+            query = query.filter(
+                Order.order_date <= last_date,
+                db.or_(Order.order_date < last_date, Order.id > last_id)
+            )
+
+        orders = query.order_by(Order.order_date.desc(), Order.id).limit(per_page + 1).all()
+        has_next = len(orders) > per_page
+        orders = orders[:per_page]
+
+        response = {
+            "orders": serialize_orders(orders),
+            "pagination": {
+                "per_page": per_page,
+                "has_next": has_next,
+                "next_cursor": encode_cursor(orders[-1].order_date, orders[-1].id) if has_next else None
+            }
+        }
+        print(f"✅ Returning {len(orders)} orders")
+        return jsonify(response), 200
+    except Exception as e:
+        print(f"❌ Error in /orders: {str(e)}")
+        return jsonify({"error": "Server error", "details": str(e)}), 500
 
 @app.route("/categories", methods=["GET"])
 # @jwt_required()
+@read_only
 def get_categories():
     """Get all categories"""
     print("📩 Received GET /categories request")
  
     try:
         categories = Category.query.all()
-        response = [{
-            "id": c.id,
-            "name": c.name,
-            "description": c.description,
-            "created_at": c.created_at,
-            "updated_at": c.updated_at
-        } for c in categories]
+        response = [serialize_category(c) for c in categories]
  
         print("✅ Returning Categories:", response)
         return jsonify(response)
@@ -623,6 +1133,7 @@ def add_category():
 
         db.session.add(new_category)
         db.session.commit()
+        catalog_cache.bump()
         print("✅ Category added successfully!")
 
         return jsonify({"message": "Category added successfully", "category_id": new_category.id}), 201
@@ -651,6 +1162,7 @@ def update_category(id):
     category.description = data.get("description", category.description)
  
     db.session.commit()
+    catalog_cache.bump()
     return jsonify({"message": "Category updated successfully"})
  
 @app.route("/categories/<int:id>", methods=["DELETE"])
@@ -663,20 +1175,30 @@ def delete_category(id):
  
     db.session.delete(category)
     db.session.commit()
+    catalog_cache.bump()
     return jsonify({"message": "Category deleted successfully"})
  
 @app.route("/stock_levels", methods=["GET"])
+@read_only
 def get_stock_levels():
-    """Get stock levels for all products"""
+    """Get stock levels for all products
+
+    Supports keyset pagination (?limit=&cursor=) and streaming (?stream=ndjson|json).
+    """
     try:
-        products = Product.query.all()
-        response = [{
-            "name": p.name,
-            "category": p.category.name,
-            "stock_quantity": p.stock_quantity
-        } for p in products]
+        stream_format = wants_stream()
+        if stream_format:
+            return stream_rows(product_query(), Product.id, serialize_stock_level, stream_format)
+        if wants_page():
+            return jsonify(keyset_page(product_query(), Product.id, serialize_stock_level)), 200
+
+        products = product_query().all()
+        response = [serialize_stock_level(p) for p in products]
 
         return jsonify(response), 200
+    except InvalidCursor as e:
+        print(f"❌ {str(e)}")
+        return jsonify({"error": "Invalid cursor"}), 400
     except Exception as e:
         return jsonify({"error": "Server error", "details": str(e)}), 500
 
@@ -684,14 +1206,12 @@ def get_stock_levels():
 def get_best_selling_product():
     """Get the best selling product details"""
     try:
-        # Calculate total quantities sold and cumulative price for each product
+        # Sum the daily rollup (one row per product per day) rather than every sale
         sales_data = db.session.query(
-            Product.id,
-            Product.name,
-            Product.category_id,
-            db.func.sum(Sale.quantity_sold).label("total_quantity_sold"),
-            db.func.sum(Sale.total_price).label("cumulative_price")
-        ).join(Sale).group_by(Product.id).order_by(db.desc("total_quantity_sold")).first()
+            SalesDailyRollup.product_id.label("id"),
+            db.func.sum(SalesDailyRollup.units).label("total_quantity_sold"),
+            db.func.sum(SalesDailyRollup.revenue).label("cumulative_price")
+        ).group_by(SalesDailyRollup.product_id).order_by(db.desc("total_quantity_sold")).first()
 
         if not sales_data:
             return jsonify({"message": "No sales data available"}), 404
@@ -709,7 +1229,59 @@ def get_best_selling_product():
     except Exception as e:
         return jsonify({"error": "Server error", "details": str(e)}), 500
 
+@app.route("/best_sellers", methods=["GET"])
+def get_best_sellers():
+    """Top-N best sellers over a recent window (?window=hour|day|week|month&limit=20)
+
+    Served from in-memory counters, without querying the database.
+    """
+    window = request.args.get("window", "day")
+    if window not in BEST_SELLER_WINDOWS:
+        return jsonify({"error": f"Invalid window. Use one of: {', '.join(BEST_SELLER_WINDOWS)}"}), 400
+
+    limit = max(1, min(request.args.get("limit", 20, type=int), 100))
+    return jsonify({"window": window, "best_sellers": best_sellers.top(window, limit)}), 200
+
+@app.route("/sales/revenue", methods=["GET"])
+def get_revenue():
+    """Daily units and revenue from the sales rollup (?start_date=&end_date=&product_id=)"""
+    try:
+        query = db.session.query(
+            SalesDailyRollup.day,
+            db.func.sum(SalesDailyRollup.units).label("units"),
+            db.func.sum(SalesDailyRollup.revenue).label("revenue")
+        )
+
+        try:
+            if request.args.get("start_date"):
+                query = query.filter(SalesDailyRollup.day >= datetime.strptime(request.args["start_date"], "%Y-%m-%d").date())
+            if request.args.get("end_date"):
+                query = query.filter(SalesDailyRollup.day <= datetime.strptime(request.args["end_date"], "%Y-%m-%d").date())
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+        product_id = request.args.get("product_id", type=int)
+        if product_id:
+            query = query.filter(SalesDailyRollup.product_id == product_id)
+
+        days = query.group_by(SalesDailyRollup.day).order_by(SalesDailyRollup.day).all()
+        response = {
+            "total_units": sum(d.units for d in days),
+            "total_revenue": sum(d.revenue for d in days),
+            "days": [{"day": d.day.isoformat(), "units": d.units, "revenue": d.revenue} for d in days]
+        }
+        return jsonify(response), 200
+    except Exception as e:
+        return jsonify({"error": "Server error", "details": str(e)}), 500
+
+@app.cli.command("backfill-sales-rollup")
+def backfill_sales_rollup_command():
+    """Rebuild the sales_daily_rollup table from all recorded sales"""
+    rows = backfill_sales_rollup()
+    print(f"✅ Sales rollup rebuilt: {rows} product-day rows")
+
 @app.route("/colors", methods=["GET"])
+@read_only
 def get_colors():
     """Get all colors"""
     try:
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import get_jwt, jwt_required
+from models import db, User
+from worker_sync import worker_sync
+import threading
+import time
+
+USER_CACHE_TTL = 60  # Seconds a cached user row is trusted before it is read again
+USER_CACHE_SIZE = 1024
+
+
+class UserCache:
+    """Small TTL + LRU cache of (id, username, role) rows keyed by username
+
+    Lets the JWT user lookup run on every protected request without a query
+    each time. Entries are plain rows, not ORM objects, so they are safe to
+    share across requests. invalidate() must be called when a user's password
+    or role changes; it goes through `sync`, so every worker drops the entry.
+    Otherwise a change is picked up within `ttl` seconds.
+    """
+
+    def __init__(self, ttl=USER_CACHE_TTL, max_entries=USER_CACHE_SIZE, clock=time.monotonic, sync=worker_sync):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()  # username -> (row, expires at)
+        self._lock = threading.Lock()
+        self.sync = sync
+        sync.register("user_invalidate", self._evict)
+
+    def get(self, username):
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(username)
+                return entry[0]
+
+        row = db.session.execute(
+            db.select(User.id, User.username, User.role).where(User.username == username)
+        ).first()
+        if row is None:
+            return None  # Misses are not cached, so a newly created user works at once
+
+        with self._lock:
+            self._entries[username] = (row, now + self.ttl)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return row
+
+    def invalidate(self, username):
+        """Drop `username` on every worker"""
+        self.sync.publish("user_invalidate", username)
+
+    def _evict(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
+
+
+user_cache = UserCache()
+
+
+def register_user_lookup(jwt):
+    """Resolve the token's user from the cache on every @jwt_required() request
+
+    A token whose role claim no longer matches the user's role (or whose user
+    is gone) is rejected with 401, so a demotion takes effect without waiting
+    for the token to expire.
+    """
+    @jwt.user_lookup_loader
+    def load_user(jwt_header, jwt_data):
+        user = user_cache.get(jwt_data["sub"])
+        if user is None or user.role != jwt_data.get("role"):
+            return None
+        return user
+
+
+def role_required(*roles):
+    """@jwt_required() that also demands one of `roles` in the token's role claim
+
+    Checks the claims only, so it adds no queries to the request.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            if get_jwt().get("role") not in roles:
+                return jsonify({"error": "Forbidden", "required_roles": list(roles)}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,132 @@
+from collections import Counter, deque
+from models import db, Product, Sale
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+from worker_sync import worker_sync
+import heapq
+import threading
+import time
+
+# window name -> (span, bucket size) in seconds; a window's edge is accurate to one bucket
+WINDOWS = {
+    "hour": (3600, 60),
+    "day": (86400, 900),
+    "week": (7 * 86400, 3600),
+    "month": (30 * 86400, 6 * 3600),
+}
+
+
+def to_timestamp(value):
+    """Epoch seconds for a naive UTC datetime (as stored in Sale.sale_date)"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class Window:
+    """Sliding window of per-product totals made of fixed-size time buckets
+
+    `units` and `revenue` always hold the sum of the live buckets, so expiring
+    a bucket is a subtraction and a top-N query never re-aggregates.
+    """
+
+    def __init__(self, span, bucket_size):
+        self.span = span
+        self.bucket_size = bucket_size
+        self.buckets = deque()  # (bucket start, units Counter, revenue Counter), oldest first
+        self.units = Counter()
+        self.revenue = Counter()
+
+    def add(self, ts, product_id, units, revenue):
+        start = ts - ts % self.bucket_size
+        if self.buckets and start <= self.buckets[-1][0]:
+            # Same bucket, or a slightly late event: count it in the newest bucket
+            bucket = self.buckets[-1]
+        else:
+            bucket = (start, Counter(), Counter())
+            self.buckets.append(bucket)
+        bucket[1][product_id] += units
+        bucket[2][product_id] += revenue
+        self.units[product_id] += units
+        self.revenue[product_id] += revenue
+
+    def expire(self, now):
+        cutoff = now - self.span
+        while self.buckets and self.buckets[0][0] + self.bucket_size <= cutoff:
+            _, units, revenue = self.buckets.popleft()
+            self.units.subtract(units)
+            self.revenue.subtract(revenue)
+            for product_id in units:
+                if self.units[product_id] <= 0:
+                    del self.units[product_id]
+                    self.revenue.pop(product_id, None)
+
+    def top(self, k):
+        return heapq.nlargest(k, self.units.items(), key=itemgetter(1))
+
+
+class BestSellerEngine:
+    """In-process top-N best sellers over the last hour/day/week/month
+
+    Warmed from the sale table at startup and updated by every recorded sale,
+    so queries never touch the database. Each worker keeps its own counters;
+    sales are published through `sync`, so every worker counts the sales
+    recorded on all of them.
+    """
+
+    def __init__(self, windows=WINDOWS, sync=worker_sync):
+        self.windows = {name: Window(span, bucket) for name, (span, bucket) in windows.items()}
+        self.names = {}
+        self._lock = threading.Lock()
+        self.sync = sync
+        sync.register("best_seller_sale", self._apply)
+
+    def record(self, product_id, units, revenue, name=None, when=None):
+        """Count a sale on every worker"""
+        ts = to_timestamp(when) if when else time.time()
+        self.sync.publish("best_seller_sale", {
+            "product_id": product_id, "units": units, "revenue": revenue, "name": name, "ts": ts,
+        })
+
+    def _apply(self, sale):
+        self._add(sale["product_id"], sale["units"], sale["revenue"], sale["name"], sale["ts"])
+
+    def _add(self, product_id, units, revenue, name, ts):
+        with self._lock:
+            if name:
+                self.names[product_id] = name
+            for window in self.windows.values():
+                if ts > time.time() - window.span:
+                    window.add(ts, product_id, units, revenue)
+
+    def top(self, window, k=20):
+        """Return the k best sellers in `window` as dicts, best first"""
+        now = time.time()
+        with self._lock:
+            target = self.windows[window]
+            target.expire(now)
+            return [{
+                "product_id": product_id,
+                "name": self.names.get(product_id),
+                "units": units,
+                "revenue": target.revenue[product_id],
+            } for product_id, units in target.top(k)]
+
+    def warm(self):
+        """Load sales from the longest window out of the database (this worker only); returns the number of sales loaded"""
+        longest = max(window.span for window in self.windows.values())
+        since = datetime.utcnow() - timedelta(seconds=longest)
+
+        rows = db.session.execute(
+            db.select(Sale.product_id, Product.name, Sale.sale_date, Sale.quantity_sold, Sale.total_price)
+            .join(Product)
+            .where(Sale.sale_date >= since)
+            .order_by(Sale.sale_date)
+            .execution_options(yield_per=1000)
+        )
+        count = 0
+        for row in rows:
+            self._add(row.product_id, row.quantity_sold, row.total_price, row.name, to_timestamp(row.sale_date))
+            count += 1
+        return count
+
+
+best_sellers = BestSellerEngine()
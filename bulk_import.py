@@ -0,0 +1,125 @@
+from models import db, Category, Product, DEFAULT_LOW_STOCK_THRESHOLD
+import csv
+import io
+import json
+
+IMPORT_BATCH_SIZE = 1000  # Rows per executemany INSERT and per transaction
+MAX_REPORTED_ERRORS = 1000  # Keep the response bounded for badly broken files
+
+REQUIRED_FIELDS = ["name", "category_id", "stock_quantity", "selling_price"]
+
+
+def detect_format(filename, content_type, requested=None):
+    """Return "csv" or "ndjson" based on ?format=, the file name or the content type"""
+    if requested in ("csv", "ndjson"):
+        return requested
+    name = (filename or "").lower()
+    if name.endswith(".csv") or "csv" in (content_type or ""):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    return None
+
+
+def iter_records(stream, fmt):
+    """Yield (line_number, record_or_error) pairs from a binary stream, one row at a time"""
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, "Each line must be a JSON object"
+            continue
+        yield line_number, record
+
+
+def validate_record(record, category_ids):
+    """Return (row values, None) for a valid record or (None, error message)"""
+    missing = [field for field in REQUIRED_FIELDS if record.get(field) in (None, "")]
+    if missing:
+        return None, f"Missing field(s): {', '.join(missing)}"
+
+    try:
+        row = {
+            "name": str(record["name"]).strip(),
+            "category_id": int(record["category_id"]),
+            "size": str(record["size"]) if record.get("size") not in (None, "") else None,
+            "stock_quantity": int(record["stock_quantity"]),
+            "selling_price": float(record["selling_price"]),
+            "low_stock_threshold": (int(record["low_stock_threshold"])
+                                    if record.get("low_stock_threshold") not in (None, "")
+                                    else DEFAULT_LOW_STOCK_THRESHOLD),  # 0 is a valid threshold
+        }
+    except (TypeError, ValueError) as e:
+        return None, f"Invalid data type: {e}"
+
+    if not row["name"]:
+        return None, "Name must not be empty"
+    if row["category_id"] not in category_ids:
+        return None, f"Category not found: {row['category_id']}"
+    if row["stock_quantity"] < 0 or row["selling_price"] < 0:
+        return None, "stock_quantity and selling_price must not be negative"
+    return row, None
+
+
+def import_products(stream, fmt, batch_size=IMPORT_BATCH_SIZE):
+    """Validate and insert products from a CSV/NDJSON stream
+
+    Rows are validated as they are read and inserted with one executemany per
+    batch, each batch in its own transaction. Invalid rows are reported and
+    skipped; they never abort the rest of the file.
+    """
+    category_ids = set(db.session.scalars(db.select(Category.id)))
+    insert = Product.__table__.insert()
+
+    summary = {"inserted": 0, "failed": 0, "errors": []}
+    batch, batch_lines = [], []
+
+    def report(line_number, error):
+        summary["failed"] += 1
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append({"row": line_number, "error": error})
+
+    def flush():
+        if not batch:
+            return
+        try:
+            db.session.execute(insert, batch)
+            db.session.commit()
+            summary["inserted"] += len(batch)
+        except Exception as e:
+            db.session.rollback()
+            for line_number in batch_lines:
+                report(line_number, f"Database error: {e}")
+        batch.clear()
+        batch_lines.clear()
+
+    for line_number, record in iter_records(stream, fmt):
+        if isinstance(record, str):
+            report(line_number, record)
+            continue
+
+        row, error = validate_record(record, category_ids)
+        if error:
+            report(line_number, error)
+            continue
+
+        batch.append(row)
+        batch_lines.append(line_number)
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    return summary
@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from flask import current_app, jsonify, request
+from worker_sync import worker_sync
+import hashlib
+import threading
+
+
+class CatalogCache:
+    """In-process cache of serialized catalog responses
+
+    `version` is bumped by every handler that changes products, stock or
+    categories. A bump drops all cached bodies, so a poll that arrives between
+    two writes is answered from memory (or with a 304) without touching the
+    database. Each worker keeps its own cache; bumps go through `sync`, so a
+    write on one worker also invalidates the caches of the others.
+    """
+
+    def __init__(self, max_entries=256, sync=worker_sync):
+        self.version = 0
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.sync = sync
+        sync.register("catalog_bump", self._invalidate)
+
+    def bump(self):
+        """Invalidate every cached response after a catalog write, on every worker"""
+        self.sync.publish("catalog_bump", None)
+
+    def _invalidate(self, payload):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, version, entry):
+        """Store `entry` unless the catalog changed while it was being built"""
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+catalog_cache = CatalogCache()
+
+
+def cached_json(build):
+    """Serve a catalog response from the cache with a strong ETag
+
+    `build` returns a payload or a (payload, status) tuple and is only called on
+    a cache miss. Only 200 responses are cached. The ETag is a hash of the
+    response bytes, so a matching If-None-Match gets a 304.
+    """
+    key = request.full_path
+    entry = catalog_cache.get(key)
+
+    if entry is None:
+        version = catalog_cache.version
+        result = build()
+        payload, status = result if isinstance(result, tuple) else (result, 200)
+        if status != 200:
+            return jsonify(payload), status
+
+        body = jsonify(payload).get_data()
+        entry = (body, hashlib.sha256(body).hexdigest()[:32])
+        catalog_cache.put(key, version, entry)
+
+    body, etag = entry
+    response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"  # Clients must revalidate on every poll
+    return response.make_conditional(request)
@@ -0,0 +1,35 @@
+from models import db, Product, ProductChange
+from serializers import serialize_inventory_item
+from stock import chunks
+
+
+def changes_since(since, limit):
+    """Inventory rows changed or deleted after change sequence `since`
+
+    product_change keeps one row per product holding the sequence number of
+    its latest insert, update or delete (maintained by triggers), so a client
+    that saw everything up to `since` only downloads what moved since then.
+    Pass the returned "since" back on the next call; "has_more" means another
+    page is waiting. since=0 returns the whole inventory.
+    """
+    rows = db.session.execute(
+        db.select(ProductChange.product_id, ProductChange.seq, ProductChange.deleted)
+        .where(ProductChange.seq > since)
+        .order_by(ProductChange.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changed_ids = [row.product_id for row in rows if not row.deleted]
+    products = {}
+    for chunk in chunks(changed_ids):
+        products.update((p.id, p) for p in Product.query.filter(Product.id.in_(chunk)))
+
+    return {
+        # A product deleted after its change row was read is skipped here; its tombstone comes next time
+        "changes": [serialize_inventory_item(products[i]) for i in changed_ids if i in products],
+        "deleted": [row.product_id for row in rows if row.deleted],
+        "since": rows[-1].seq if rows else since,
+        "has_more": has_more,
+    }
@@ -0,0 +1,104 @@
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from functools import wraps
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import os
+import sqlite3
+
+DEFAULT_DATABASE_URL = "sqlite:///inventory.db"  # Relative SQLite paths live in the instance folder
+READ_BIND = "read"  # Bind key of the engine @read_only views query
+
+# Applied to every new SQLite connection; each can be overridden from the environment
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),  # Readers no longer wait for writers
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),  # Safe with WAL; fsync at checkpoints only
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),  # Wait for the write lock instead of failing
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    "cache_size": int(os.environ.get("SQLITE_CACHE_SIZE", -64 * 1024)),  # Negative = KiB, so 64 MiB
+}
+
+
+def normalize_uri(uri):
+    if uri.startswith("postgres://"):  # Old-style scheme some hosts still hand out
+        uri = "postgresql://" + uri[len("postgres://"):]
+    return uri
+
+
+def database_uri():
+    """DATABASE_URL from the environment, defaulting to the bundled SQLite file"""
+    return normalize_uri(os.environ.get("DATABASE_URL", DEFAULT_DATABASE_URL))
+
+
+def read_database_uri(uri):
+    """URL of the read engine: DATABASE_READ_URL (e.g. a PostgreSQL replica), or for a
+    SQLite file the same file opened with mode=ro; None means reads use the primary"""
+    read_uri = os.environ.get("DATABASE_READ_URL")
+    if read_uri:
+        return normalize_uri(read_uri)
+    if uri.startswith("sqlite:///") and "?" not in uri and not uri.endswith(":memory:"):
+        return f"sqlite:///file:{uri[len('sqlite:///'):]}?mode=ro&uri=true"
+    return None
+
+
+def engine_options(uri):
+    """create_engine() options for `uri`: a sized, pre-pinged pool for servers, defaults for SQLite"""
+    if uri.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),  # Drop connections before the server does
+        "pool_pre_ping": True,  # Replace connections that died while idle instead of failing a request
+    }
+
+
+def init_engine(app):
+    """Point the app at DATABASE_URL (and the read engine) with tuned engine options; call before db.init_app(app)"""
+    uri = database_uri()
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(uri)
+
+    read_uri = read_database_uri(uri)
+    if read_uri:
+        app.config["SQLALCHEMY_BINDS"] = {READ_BIND: {"url": read_uri, **engine_options(read_uri)}}
+
+
+class RoutingSession(Session):
+    """db.session that sends the queries of @read_only views to the read engine
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary, so a
+    view marked read-only by mistake still writes to the right place. Without
+    a read engine everything uses the primary as before.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_app_context() and g.get("read_only")
+                and not getattr(clause, "is_dml", False) and READ_BIND in self._db.engines):
+            return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(view):
+    """Run this view's queries on the read engine, off the writer's connections"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        try:
+            cursor.execute(f"PRAGMA {name} = {value}")
+        except sqlite3.OperationalError:
+            if name != "journal_mode":
+                raise
+            # A mode=ro connection can't switch the journal mode; the writer's connections do
+    cursor.close()
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+from flask import current_app, jsonify, make_response, request
+from functools import wraps
+from sqlalchemy.exc import IntegrityError
+from models import db, IdempotencyKey
+import hashlib
+import threading
+import time
+
+DEFAULT_TTL = 24 * 3600  # Seconds a key (and its stored response) is kept
+DEFAULT_CLAIM_TIMEOUT = 60  # Seconds a claim without a response blocks retries; keep above the slowest request
+PURGE_INTERVAL = 60  # Seconds between sweeps of expired keys
+MAX_KEY_LENGTH = 64
+
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def purge_expired(ttl):
+    """Delete expired keys, at most once every PURGE_INTERVAL seconds per process"""
+    global _last_purge
+    with _purge_lock:
+        if time.monotonic() - _last_purge < PURGE_INTERVAL:
+            return
+        _last_purge = time.monotonic()
+    db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.created_at < datetime.utcnow() - timedelta(seconds=ttl)))
+    db.session.commit()
+
+
+def replay(record):
+    response = current_app.response_class(record.response_body, status=record.status_code, mimetype="application/json")
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def take_over(record, now, timeout):
+    """Re-claim a key whose first request never stored a response (worker killed or timed out)
+
+    The claim is abandoned once it is older than `timeout`. The conditional
+    UPDATE only matches the claim we read, so when several retries race for
+    an abandoned key exactly one of them wins. Returns True for the winner.
+    """
+    if record.claimed_at > now - timedelta(seconds=timeout):
+        return False
+    taken = db.session.execute(
+        db.update(IdempotencyKey)
+        .where(IdempotencyKey.key == record.key, IdempotencyKey.endpoint == record.endpoint,
+               IdempotencyKey.status_code.is_(None), IdempotencyKey.claimed_at == record.claimed_at)
+        .values(claimed_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount == 1
+    db.session.commit()
+    return taken
+
+
+def idempotent(view):
+    """Make a POST endpoint safe to retry with an `Idempotency-Key` header
+
+    The first request claims the key (a committed row with no response yet),
+    runs the view and stores its status and body. A retry with the same key
+    gets the stored response back without running the view again; a retry
+    while the first request is still running gets 409, until the claim is
+    older than IDEMPOTENCY_CLAIM_TIMEOUT: then the first request is presumed
+    dead and the retry takes the key over and runs the view. Reusing a key
+    for a different body is rejected with 422. 5xx responses are not stored,
+    so they can be retried. Requests without the header are unaffected.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+        ttl = current_app.config.get("IDEMPOTENCY_KEY_TTL", DEFAULT_TTL)
+        claim_timeout = current_app.config.get("IDEMPOTENCY_CLAIM_TIMEOUT", DEFAULT_CLAIM_TIMEOUT)
+        purge_expired(ttl)
+
+        now = datetime.utcnow()
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+        record = db.session.get(IdempotencyKey, (key, request.endpoint))
+        if record and record.created_at < now - timedelta(seconds=ttl):
+            db.session.delete(record)
+            db.session.commit()
+            record = None
+
+        if record is None:
+            try:
+                db.session.add(IdempotencyKey(key=key, endpoint=request.endpoint, request_hash=request_hash,
+                                              created_at=now, claimed_at=now))
+                db.session.commit()
+            except IntegrityError:
+                # Another worker claimed the same key first
+                db.session.rollback()
+                record = db.session.get(IdempotencyKey, (key, request.endpoint))
+
+        if record is not None:
+            if record.request_hash != request_hash:
+                return jsonify({"error": "Idempotency-Key was already used with a different request body"}), 422
+            if record.status_code is not None:
+                print(f"♻️ Replaying stored response for Idempotency-Key {key}")
+                return replay(record)
+            if not take_over(record, now, claim_timeout):
+                return jsonify({"error": "A request with this Idempotency-Key is still in progress"}), 409
+            print(f"♻️ Taking over abandoned Idempotency-Key {key}")
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            # Release the claim so the client can retry
+            db.session.rollback()
+            db.session.execute(db.delete(IdempotencyKey).filter_by(key=key, endpoint=request.endpoint))
+            db.session.commit()
+            raise
+
+        claim = db.session.get(IdempotencyKey, (key, request.endpoint))
+        if response.status_code >= 500:
+            db.session.delete(claim)
+        else:
+            claim.status_code = response.status_code
+            claim.response_body = response.get_data(as_text=True)
+        db.session.commit()
+        return response
+
+    return wrapper
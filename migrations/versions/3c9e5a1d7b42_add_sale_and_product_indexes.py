@@ -0,0 +1,38 @@
+"""Add sale and product indexes
+
+Revision ID: 3c9e5a1d7b42
+Revises: 8721a7a97da0
+Create Date: 2026-10-17 09:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9e5a1d7b42'
+down_revision = '8721a7a97da0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.create_index('ix_product_category_id', ['category_id'], unique=False)
+
+    with op.batch_alter_table('sale', schema=None) as batch_op:
+        batch_op.create_index('ix_sale_sale_date_id', [sa.text('sale_date DESC'), 'id'], unique=False)
+        batch_op.create_index('ix_sale_product_id_sale_date', ['product_id', 'sale_date'], unique=False)
+        batch_op.create_index('ix_sale_payment_method_sale_date', ['payment_method', 'sale_date'], unique=False)
+        batch_op.create_index('ix_sale_sale_status_sale_date', ['sale_status', 'sale_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sale', schema=None) as batch_op:
+        batch_op.drop_index('ix_sale_sale_status_sale_date')
+        batch_op.drop_index('ix_sale_payment_method_sale_date')
+        batch_op.drop_index('ix_sale_product_id_sale_date')
+        batch_op.drop_index('ix_sale_sale_date_id')
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_category_id')
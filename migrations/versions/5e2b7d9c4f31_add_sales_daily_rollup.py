@@ -0,0 +1,44 @@
+"""Add sales daily rollup
+
+Revision ID: 5e2b7d9c4f31
+Revises: a41f2c8e9d10
+Create Date: 2026-10-17 14:22:48.106533
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b7d9c4f31'
+down_revision = 'a41f2c8e9d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_daily_rollup',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+    sa.PrimaryKeyConstraint('product_id', 'day')
+    )
+    with op.batch_alter_table('sales_daily_rollup', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_sales_daily_rollup_day'), ['day'], unique=False)
+
+    # Seed from existing sales; `flask backfill-sales-rollup` rebuilds it later if needed
+    day = 'date(sale_date)' if op.get_bind().dialect.name == 'sqlite' else 'CAST(sale_date AS DATE)'
+    op.execute(
+        'INSERT INTO sales_daily_rollup (product_id, day, units, revenue) '
+        f'SELECT product_id, {day}, SUM(quantity_sold), SUM(total_price) FROM sale '
+        f'WHERE sale_date IS NOT NULL GROUP BY product_id, {day}'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('sales_daily_rollup', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sales_daily_rollup_day'))
+
+    op.drop_table('sales_daily_rollup')
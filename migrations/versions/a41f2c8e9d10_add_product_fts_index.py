@@ -0,0 +1,77 @@
+"""Add product full-text search index
+
+Revision ID: a41f2c8e9d10
+Revises: 3c9e5a1d7b42
+Create Date: 2026-10-17 11:40:07.915264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f2c8e9d10'
+down_revision = '3c9e5a1d7b42'
+branch_labels = None
+depends_on = None
+
+
+# product_fts rowid == product.id; triggers keep it in step with product and category
+FTS_STATEMENTS = [
+    """
+    CREATE VIRTUAL TABLE product_fts USING fts5(
+        name, size, category,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER product_fts_after_insert AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts (rowid, name, size, category)
+        VALUES (new.id, new.name, new.size, (SELECT name FROM category WHERE id = new.category_id));
+    END
+    """,
+    """
+    CREATE TRIGGER product_fts_after_delete AFTER DELETE ON product BEGIN
+        DELETE FROM product_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER product_fts_after_update AFTER UPDATE OF name, size, category_id ON product BEGIN
+        DELETE FROM product_fts WHERE rowid = old.id;
+        INSERT INTO product_fts (rowid, name, size, category)
+        VALUES (new.id, new.name, new.size, (SELECT name FROM category WHERE id = new.category_id));
+    END
+    """,
+    """
+    CREATE TRIGGER category_fts_after_update AFTER UPDATE OF name ON category BEGIN
+        UPDATE product_fts SET category = new.name
+        WHERE rowid IN (SELECT id FROM product WHERE category_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO product_fts (rowid, name, size, category)
+    SELECT product.id, product.name, product.size, category.name
+    FROM product LEFT JOIN category ON category.id = product.category_id
+    """,
+]
+
+
+def upgrade():
+    # FTS5 is SQLite-only
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for statement in FTS_STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute('DROP TRIGGER IF EXISTS category_fts_after_update')
+    op.execute('DROP TRIGGER IF EXISTS product_fts_after_update')
+    op.execute('DROP TRIGGER IF EXISTS product_fts_after_delete')
+    op.execute('DROP TRIGGER IF EXISTS product_fts_after_insert')
+    op.execute('DROP TABLE IF EXISTS product_fts')
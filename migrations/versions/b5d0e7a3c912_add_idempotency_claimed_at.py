@@ -0,0 +1,32 @@
+"""Add idempotency claimed_at
+
+Revision ID: b5d0e7a3c912
+Revises: e6a2c9d40b17
+Create Date: 2026-10-17 21:12:40.331958
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d0e7a3c912'
+down_revision = 'e6a2c9d40b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('idempotency_key', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+    # Existing claims were taken when the key was created
+    op.execute('UPDATE idempotency_key SET claimed_at = created_at')
+
+    with op.batch_alter_table('idempotency_key', schema=None) as batch_op:
+        batch_op.alter_column('claimed_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('idempotency_key', schema=None) as batch_op:
+        batch_op.drop_column('claimed_at')
@@ -0,0 +1,48 @@
+"""Widen product FTS prefix index
+
+Revision ID: c1f4a7e2d963
+Revises: b5d0e7a3c912
+Create Date: 2026-10-17 22:04:51.602113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1f4a7e2d963'
+down_revision = 'b5d0e7a3c912'
+branch_labels = None
+depends_on = None
+
+
+# Prefix indexes for 1-4 characters, so type-ahead queries like "b" or "bead"
+# don't merge the doclists of every matching term. The triggers on product and
+# category refer to product_fts by name and keep working across the rebuild.
+def rebuild(prefix):
+    op.execute('DROP TABLE product_fts')
+    op.execute(f"""
+        CREATE VIRTUAL TABLE product_fts USING fts5(
+            name, size, category,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '{prefix}'
+        )
+    """)
+    op.execute("""
+        INSERT INTO product_fts (rowid, name, size, category)
+        SELECT product.id, product.name, product.size, category.name
+        FROM product LEFT JOIN category ON category.id = product.category_id
+    """)
+
+
+def upgrade():
+    # FTS5 is SQLite-only
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    rebuild('1 2 3 4')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    rebuild('2 3')
@@ -0,0 +1,28 @@
+"""Add order indexes
+
+Revision ID: c7a4f08e3b19
+Revises: 9b6d3e1f2a57
+Create Date: 2026-10-17 17:31:12.640975
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a4f08e3b19'
+down_revision = '9b6d3e1f2a57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.create_index('ix_order_order_date_id', [sa.text('order_date DESC'), 'id'], unique=False)
+        batch_op.create_index('ix_order_order_status_order_date', ['order_status', 'order_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_order_status_order_date')
+        batch_op.drop_index('ix_order_order_date_id')
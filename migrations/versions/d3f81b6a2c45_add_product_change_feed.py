@@ -0,0 +1,113 @@
+"""Add product change feed
+
+Revision ID: d3f81b6a2c45
+Revises: c7a4f08e3b19
+Create Date: 2026-10-17 18:47:26.301558
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f81b6a2c45'
+down_revision = 'c7a4f08e3b19'
+branch_labels = None
+depends_on = None
+
+
+# Every insert, update or delete of a product moves its product_change row to
+# the next sequence number; deletes leave the row behind as a tombstone
+CHANGED = ' OR '.join(
+    f'new.{column} IS NOT old.{column}'
+    for column in ('name', 'category_id', 'size', 'stock_quantity', 'selling_price', 'low_stock_threshold')
+)
+
+SQLITE_STATEMENTS = [
+    """
+    CREATE TRIGGER product_change_after_insert AFTER INSERT ON product BEGIN
+        INSERT INTO product_change (product_id, seq, deleted)
+        VALUES (new.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM product_change), 0)
+        ON CONFLICT (product_id) DO UPDATE SET seq = excluded.seq, deleted = 0;
+    END
+    """,
+    f"""
+    CREATE TRIGGER product_change_after_update AFTER UPDATE ON product WHEN {CHANGED} BEGIN
+        INSERT INTO product_change (product_id, seq, deleted)
+        VALUES (new.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM product_change), 0)
+        ON CONFLICT (product_id) DO UPDATE SET seq = excluded.seq, deleted = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER product_change_after_delete AFTER DELETE ON product BEGIN
+        INSERT INTO product_change (product_id, seq, deleted)
+        VALUES (old.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM product_change), 1)
+        ON CONFLICT (product_id) DO UPDATE SET seq = excluded.seq, deleted = 1;
+    END
+    """,
+    'INSERT INTO product_change (product_id, seq, deleted) SELECT id, id, 0 FROM product',
+]
+
+POSTGRESQL_STATEMENTS = [
+    'CREATE SEQUENCE product_change_seq',
+    """
+    CREATE FUNCTION product_change_log() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO product_change (product_id, seq, deleted)
+            VALUES (OLD.id, nextval('product_change_seq'), true)
+            ON CONFLICT (product_id) DO UPDATE SET seq = excluded.seq, deleted = true;
+            RETURN OLD;
+        END IF;
+        INSERT INTO product_change (product_id, seq, deleted)
+        VALUES (NEW.id, nextval('product_change_seq'), false)
+        ON CONFLICT (product_id) DO UPDATE SET seq = excluded.seq, deleted = false;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER product_change_after_insert_delete AFTER INSERT OR DELETE ON product
+    FOR EACH ROW EXECUTE FUNCTION product_change_log()
+    """,
+    """
+    CREATE TRIGGER product_change_after_update AFTER UPDATE ON product
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION product_change_log()
+    """,
+    'INSERT INTO product_change (product_id, seq, deleted) SELECT id, id, false FROM product',
+    "SELECT setval('product_change_seq', COALESCE((SELECT MAX(seq) FROM product_change), 0) + 1, false)",
+]
+
+
+def upgrade():
+    op.create_table('product_change',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('deleted', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    with op.batch_alter_table('product_change', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_change_seq'), ['seq'], unique=True)
+
+    dialect = op.get_bind().dialect.name
+    statements = {'sqlite': SQLITE_STATEMENTS, 'postgresql': POSTGRESQL_STATEMENTS}.get(dialect, [])
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS product_change_after_delete')
+        op.execute('DROP TRIGGER IF EXISTS product_change_after_update')
+        op.execute('DROP TRIGGER IF EXISTS product_change_after_insert')
+    elif dialect == 'postgresql':
+        op.execute('DROP TRIGGER IF EXISTS product_change_after_update ON product')
+        op.execute('DROP TRIGGER IF EXISTS product_change_after_insert_delete ON product')
+        op.execute('DROP FUNCTION IF EXISTS product_change_log()')
+        op.execute('DROP SEQUENCE IF EXISTS product_change_seq')
+
+    with op.batch_alter_table('product_change', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_change_seq'))
+
+    op.drop_table('product_change')
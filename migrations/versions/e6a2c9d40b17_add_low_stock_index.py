@@ -0,0 +1,32 @@
+"""Add low stock index
+
+Revision ID: e6a2c9d40b17
+Revises: d3f81b6a2c45
+Create Date: 2026-10-17 19:36:02.518840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a2c9d40b17'
+down_revision = 'd3f81b6a2c45'
+branch_labels = None
+depends_on = None
+
+
+# Must stay textually identical to models.LOW_STOCK_CONDITION for the planner to use the index
+LOW_STOCK_CONDITION = 'stock_quantity < COALESCE(low_stock_threshold, 10)'
+
+
+def upgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.create_index('ix_product_low_stock', ['stock_quantity'], unique=False,
+                              sqlite_where=sa.text(LOW_STOCK_CONDITION),
+                              postgresql_where=sa.text(LOW_STOCK_CONDITION))
+
+
+def downgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_low_stock')
@@ -1,7 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
+from database import RoutingSession
 from datetime import datetime
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # Queries in @read_only views go to the read engine
+
+DEFAULT_LOW_STOCK_THRESHOLD = 10  # Used when a product has no low_stock_threshold of its own
+# Written out literally so queries filtering on it match the partial index on product exactly
+LOW_STOCK_CONDITION = f"stock_quantity < COALESCE(low_stock_threshold, {DEFAULT_LOW_STOCK_THRESHOLD})"
 
 # Association Table for Many-to-Many Relationship between Orders & Products
 order_product = db.Table(
@@ -33,7 +38,7 @@ class Product(db.Model):
     """Product Model for Bead Inventory"""
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=False)  # ✅ Foreign Key to Category
+    category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=False, index=True)  # ✅ Foreign Key to Category
     size = db.Column(db.String(20))
     stock_quantity = db.Column(db.Integer, nullable=False)
     selling_price = db.Column(db.Float, nullable=False)
@@ -43,6 +48,13 @@ class Product(db.Model):
     category = db.relationship("Category", back_populates="products")  # Link to Category
     sales = db.relationship("Sale", back_populates="product", cascade="all, delete")  # One Product → Many Sales
     orders = db.relationship("Order", secondary=order_product, back_populates="products")  # Many-to-Many with Orders
+    sales_rollup = db.relationship("SalesDailyRollup", cascade="all, delete")  # One Product → Many daily totals
+
+    # ✅ Partial index holding only the low-stock products (backs /inventory/low-stock)
+    __table_args__ = (
+        db.Index("ix_product_low_stock", stock_quantity,
+                 sqlite_where=db.text(LOW_STOCK_CONDITION), postgresql_where=db.text(LOW_STOCK_CONDITION)),
+    )
 
 class Sale(db.Model):
     """Sales Model for Tracking Sales"""
@@ -57,6 +69,26 @@ class Sale(db.Model):
     # ✅ Relationship
     product = db.relationship("Product", back_populates="sales")  # Link to Product
 
+    # ✅ Indexes matching the /sales/all filters (newest first, then by id)
+    __table_args__ = (
+        db.Index("ix_sale_sale_date_id", sale_date.desc(), id),
+        db.Index("ix_sale_product_id_sale_date", product_id, sale_date),
+        db.Index("ix_sale_payment_method_sale_date", payment_method, sale_date),
+        db.Index("ix_sale_sale_status_sale_date", sale_status, sale_date),
+    )
+
+class SalesDailyRollup(db.Model):
+    """Per-product daily sales totals, kept up to date as sales are recorded"""
+    __tablename__ = "sales_daily_rollup"
+
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True, index=True)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+# Order statuses that still hold their stock reservation; only these orders can be cancelled
+RESERVED_ORDER_STATUSES = ("pending", "processing")
+
 class Order(db.Model):
     """Order Model for Customer Orders"""
     id = db.Column(db.Integer, primary_key=True)
@@ -68,9 +100,35 @@ class Order(db.Model):
     # ✅ Many-to-Many Relationship with Products
     products = db.relationship("Product", secondary=order_product, back_populates="orders")
 
+    # ✅ Indexes for the /orders listing (newest first, optionally by status)
+    __table_args__ = (
+        db.Index("ix_order_order_date_id", order_date.desc(), id),
+        db.Index("ix_order_order_status_order_date", order_status, order_date),
+    )
+
 class Color(db.Model):
     """Color Model for Managing Product Colors"""
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class IdempotencyKey(db.Model):
+    """Stored responses for POST requests retried with the same Idempotency-Key header"""
+    __tablename__ = "idempotency_key"
+
+    key = db.Column(db.String(64), primary_key=True)
+    endpoint = db.Column(db.String(50), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)  # NULL while the first request is still running
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    claimed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Start of the running request's lease
+
+class ProductChange(db.Model):
+    """Latest change sequence per product, written by database triggers (see /inventory/changes)"""
+    __tablename__ = "product_change"
+
+    product_id = db.Column(db.Integer, primary_key=True)  # No foreign key: the row outlives a deleted product
+    seq = db.Column(db.Integer, nullable=False, unique=True, index=True)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
@@ -0,0 +1,105 @@
+from flask import Response, request, stream_with_context
+from sqlalchemy import tuple_
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500  # Rows fetched per round trip from the server-side cursor
+
+
+class InvalidCursor(ValueError):
+    """?cursor= is not a value this listing handed out; views answer 400"""
+
+
+def wants_page():
+    """True when the client asked for a keyset page (?limit= or ?cursor=)"""
+    return "limit" in request.args or "cursor" in request.args
+
+
+def wants_stream():
+    """Return the requested stream format ("ndjson" or "json"), or None for a regular response
+
+    Streaming is opt-in, either with ?stream=ndjson|json or an
+    `Accept: application/x-ndjson` header.
+    """
+    mode = request.args.get("stream", "").lower()
+    if mode in ("1", "true", "ndjson"):
+        return "ndjson"
+    if mode == "json":
+        return "json"
+    if request.accept_mimetypes.best == "application/x-ndjson":
+        return "ndjson"
+    return None
+
+
+def keyset_page(query, key_column, serialize):
+    """Fetch one page of `query` ordered by `key_column`, starting after ?cursor=
+
+    Uses `WHERE key > :cursor ORDER BY key LIMIT n` instead of OFFSET, so every
+    page costs the same no matter how deep the client has scrolled. An empty
+    ?cursor= starts at the first page; a malformed one raises InvalidCursor.
+
+    `key_column` may also be a tuple of integer columns, e.g. (stock_quantity,
+    id) to page in the order of an index on them; the cursor is then their
+    values joined by commas and compared as a row value.
+    """
+    key_columns = key_column if isinstance(key_column, tuple) else (key_column,)
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = request.args.get("cursor", "")
+
+    if cursor:
+        try:
+            values = [int(value) for value in cursor.split(",")]
+        except ValueError:
+            raise InvalidCursor(f"Invalid cursor: {cursor}")
+        if len(values) != len(key_columns):
+            raise InvalidCursor(f"Invalid cursor: {cursor}")
+        if len(key_columns) == 1:
+            query = query.filter(key_columns[0] > values[0])
+        else:
+            query = query.filter(tuple_(*key_columns) > tuple_(*values))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(*key_columns).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        values = [getattr(rows[-1], column.key) for column in key_columns]
+        next_cursor = values[0] if len(values) == 1 else ",".join(str(value) for value in values)
+
+    return {
+        "items": [serialize(row) for row in rows],
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }
+
+
+def stream_rows(query, key_column, serialize, fmt="ndjson"):
+    """Stream every row of `query` without materialising the result set
+
+    Rows are pulled from a server-side cursor in batches of STREAM_BATCH_SIZE
+    and written out as they arrive, either as NDJSON (one object per line)
+    or as a chunked JSON array.
+    """
+    rows = query.order_by(key_column).yield_per(STREAM_BATCH_SIZE)
+
+    def generate_ndjson():
+        for row in rows:
+            yield json.dumps(serialize(row), default=str) + "\n"
+
+    def generate_json_array():
+        yield "["
+        first = True
+        for row in rows:
+            if not first:
+                yield ","
+            first = False
+            yield json.dumps(serialize(row), default=str)
+        yield "]"
+
+    if fmt == "json":
+        return Response(stream_with_context(generate_json_array()), mimetype="application/json")
+    return Response(stream_with_context(generate_ndjson()), mimetype="application/x-ndjson")
@@ -0,0 +1,58 @@
+from flask import current_app
+import bcrypt
+import threading
+
+DEFAULT_BCRYPT_ROUNDS = 12
+DEFAULT_HASH_THREADS = 4  # Native threads doing bcrypt work; further logins queue for a free one
+
+try:
+    import gevent
+    from gevent.threadpool import ThreadPool
+except ImportError:  # gevent is only needed when serving with gevent workers
+    gevent = None
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _hash_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPool(current_app.config.get("PASSWORD_HASH_THREADS", DEFAULT_HASH_THREADS))
+        return _pool
+
+
+def run_blocking(func, *args):
+    """Run CPU-heavy `func` without stalling the gevent hub
+
+    Inside a gevent greenlet the call goes to a bounded pool of native threads
+    (bcrypt releases the GIL while hashing) and only this greenlet waits, so
+    websockets and other requests on the worker keep running. Outside gevent
+    it is a plain call.
+    """
+    if gevent is not None and isinstance(gevent.getcurrent(), gevent.Greenlet):
+        return _hash_pool().apply(func, args)
+    return func(*args)
+
+
+def bcrypt_rounds():
+    return current_app.config.get("BCRYPT_ROUNDS", DEFAULT_BCRYPT_ROUNDS)
+
+
+def hash_password(password):
+    """bcrypt hash of `password` at the configured cost, as a str"""
+    salt = bcrypt.gensalt(rounds=bcrypt_rounds())
+    return run_blocking(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+
+def check_password(password, hashed):
+    return run_blocking(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def needs_rehash(hashed):
+    """True when `hashed` was made with a different cost than BCRYPT_ROUNDS ("$2b$12$..." -> 12)"""
+    try:
+        return int(hashed.split("$")[2]) != bcrypt_rounds()
+    except (IndexError, ValueError):
+        return True
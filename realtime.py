@@ -0,0 +1,146 @@
+from collections import OrderedDict
+from flask_socketio import emit, join_room, leave_room
+import itertools
+import os
+import socketio as python_socketio
+import threading
+from worker_sync import WorkerSyncMixin
+
+ALL_ROOM = "all"  # Every client starts here and gets every event until it subscribes to something narrower
+DEFAULT_DEBOUNCE_SECONDS = 0.25
+
+# Events where only the latest message per product matters; a burst collapses into one
+COALESCED_EVENTS = {"stock_update", "low_stock_alert"}
+
+
+class RedisManager(WorkerSyncMixin, python_socketio.RedisManager):
+    pass
+
+
+class KombuManager(WorkerSyncMixin, python_socketio.KombuManager):
+    pass
+
+
+def queue_manager(url, channel="beads-socketio", queue_folder=None):
+    """Client manager that fans emits out to every worker through a message queue
+
+    `url` is a redis:// URL or any Kombu URL (amqp://, filesystem://, ...).
+    Every worker publishes its emits to the queue and delivers the queued
+    messages to its own connected clients, so a sale recorded on one worker
+    reaches clients on all of them. The same queue carries worker_sync
+    messages between the workers. For Kombu's filesystem:// transport,
+    `queue_folder` is the shared directory the workers exchange messages in.
+    Returns None when no queue is configured (single-process mode).
+    """
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://")):
+        return RedisManager(url, channel=channel)
+
+    connection_options = {}
+    if url.startswith("filesystem://"):
+        folder = queue_folder or os.path.join(os.getcwd(), "instance", "socketio-queue")
+        os.makedirs(folder, exist_ok=True)
+        connection_options["transport_options"] = {
+            "data_folder_in": folder, "data_folder_out": folder, "control_folder": folder
+        }
+    return KombuManager(url, channel=channel, connection_options=connection_options)
+
+
+def product_room(product_id):
+    return f"product:{product_id}"
+
+
+def category_room(category_id):
+    return f"category:{category_id}"
+
+
+def rooms_for(product_ids=(), category_ids=()):
+    return ([ALL_ROOM]
+            + [product_room(i) for i in sorted(set(product_ids))]
+            + [category_room(i) for i in sorted(set(category_ids)) if i is not None])
+
+
+class Broadcaster:
+    """Room-scoped, debounced Socket.IO publisher
+
+    Request handlers call publish(), which only queues the message. A
+    background task flushes the queue every `window` seconds, sending each
+    message once to the "all" room plus the rooms of the products and
+    categories it concerns. Within a window, stock_update and low_stock_alert
+    messages for the same product replace each other, so a burst of sales on
+    one product reaches clients as a single update. With window=0 messages
+    are sent immediately.
+    """
+
+    def __init__(self, socketio, window=DEFAULT_DEBOUNCE_SECONDS):
+        self.socketio = socketio
+        self.window = window
+        self._pending = OrderedDict()  # key -> (event, payload, rooms)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._flusher = None
+        self.register_handlers()
+
+    def publish(self, event, payload, product_ids=(), category_ids=()):
+        rooms = rooms_for(product_ids, category_ids)
+        if not self.window:
+            self.socketio.emit(event, payload, to=rooms)
+            return
+
+        if event in COALESCED_EVENTS and len(product_ids) == 1:
+            key = (event, product_ids[0])
+        else:
+            key = (event, next(self._sequence))
+
+        with self._lock:
+            self._pending.pop(key, None)  # Re-insert so the newest message keeps its place in order
+            self._pending[key] = (event, payload, rooms)
+            if self._flusher is None:
+                self._flusher = self.socketio.start_background_task(self._run)
+
+    def flush(self):
+        """Send everything queued so far; returns the number of messages sent"""
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+        for event, payload, rooms in pending.values():
+            self.socketio.emit(event, payload, to=rooms)
+        return len(pending)
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.window)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Error flushing socket events: {str(e)}")
+
+    def register_handlers(self):
+        @self.socketio.on("connect")
+        def on_connect():
+            join_room(ALL_ROOM)
+
+        @self.socketio.on("subscribe")
+        def on_subscribe(data):
+            """{"product_ids": [..], "category_ids": [..]} narrows this client to those rooms;
+            {"all": true} goes back to receiving everything"""
+            data = data or {}
+            if data.get("all"):
+                join_room(ALL_ROOM)
+                emit("subscribed", {"rooms": [ALL_ROOM]})
+                return
+
+            rooms = rooms_for(data.get("product_ids", []), data.get("category_ids", []))[1:]
+            for room in rooms:
+                join_room(room)
+            if rooms:
+                leave_room(ALL_ROOM)
+            emit("subscribed", {"rooms": rooms})
+
+        @self.socketio.on("unsubscribe")
+        def on_unsubscribe(data):
+            data = data or {}
+            rooms = rooms_for(data.get("product_ids", []), data.get("category_ids", []))[1:]
+            for room in rooms:
+                leave_room(room)
+            emit("unsubscribed", {"rooms": rooms})
@@ -0,0 +1,56 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Sale, SalesDailyRollup
+
+
+def sale_day():
+    """SQL expression for the calendar day of Sale.sale_date"""
+    if db.session.get_bind().dialect.name == "sqlite":
+        return db.func.date(Sale.sale_date)
+    return db.cast(Sale.sale_date, db.Date)
+
+
+def record_sales(lines):
+    """Add sales to the daily rollup inside the caller's transaction
+
+    `lines` is an iterable of (product_id, day, units, revenue). Lines for the
+    same product and day are merged first, then upserted with
+    `INSERT .. ON CONFLICT (product_id, day) DO UPDATE SET units = units + ..`.
+    """
+    totals = {}
+    for product_id, day, units, revenue in lines:
+        current_units, current_revenue = totals.get((product_id, day), (0, 0))
+        totals[(product_id, day)] = (current_units + units, current_revenue + revenue)
+    if not totals:
+        return
+
+    dialect = postgresql if db.session.get_bind().dialect.name == "postgresql" else sqlite
+    insert = dialect.insert(SalesDailyRollup)
+    table = SalesDailyRollup.__table__
+    db.session.execute(
+        insert.on_conflict_do_update(
+            index_elements=[table.c.product_id, table.c.day],
+            set_={
+                "units": table.c.units + insert.excluded.units,
+                "revenue": table.c.revenue + insert.excluded.revenue,
+            },
+        ),
+        [{"product_id": product_id, "day": day, "units": units, "revenue": revenue}
+         for (product_id, day), (units, revenue) in totals.items()],
+    )
+
+
+def backfill():
+    """Rebuild the whole rollup from the sale table; returns the number of rollup rows"""
+    day = sale_day()
+    db.session.execute(db.delete(SalesDailyRollup))
+    db.session.execute(
+        db.insert(SalesDailyRollup).from_select(
+            ["product_id", "day", "units", "revenue"],
+            db.select(
+                Sale.product_id, day,
+                db.func.sum(Sale.quantity_sold), db.func.sum(Sale.total_price)
+            ).where(Sale.sale_date.is_not(None)).group_by(Sale.product_id, day),
+        )
+    )
+    db.session.commit()
+    return db.session.scalar(db.select(db.func.count()).select_from(SalesDailyRollup))
@@ -0,0 +1,224 @@
+from datetime import datetime, timedelta
+from flask import Response, stream_with_context
+from models import db, Category, Product, Sale
+import base64
+import csv
+import io
+import json
+import math
+import threading
+import time
+
+EXPORT_BATCH_SIZE = 2000  # Rows per fetch from the server-side cursor
+
+COUNT_CACHE_TTL = 30  # Seconds a cached sales count is reused for
+COUNT_CACHE_SIZE = 256
+TOTAL_MODES = ("none", "exact", "cached", "estimate")
+
+EXPORT_COLUMNS = [
+    "id", "sale_date", "product_id", "product_name", "category_name",
+    "quantity_sold", "total_price", "payment_method", "sale_status",
+]
+
+
+def parse_total_price(value):
+    """total_price from a request body as a float
+
+    Accepts JSON numbers and numeric strings ("2.50"), as the sale table
+    always has; raises ValueError for anything else (booleans, null, lists,
+    NaN/inf), which the endpoints answer with 400.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"total_price must be a number: {value!r}")
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"total_price must be a number: {value!r}")
+    if not math.isfinite(price):
+        raise ValueError(f"total_price must be a number: {value!r}")
+    return price
+
+
+def sale_filters(args):
+    """Build WHERE conditions for the sales listing/export query string
+
+    Dates are a half-open range [start_date, end_date + 1 day) on the bare
+    sale_date column so the sale_date indexes can be used. Raises ValueError
+    for a malformed date.
+    """
+    conditions = []
+
+    start_date = args.get("start_date")
+    if start_date:
+        try:
+            conditions.append(Sale.sale_date >= datetime.strptime(start_date, "%Y-%m-%d"))
+        except ValueError:
+            raise ValueError(f"Invalid start_date format: {start_date}")
+
+    end_date = args.get("end_date")
+    if end_date:
+        try:
+            # Add one day to include the end date fully
+            conditions.append(Sale.sale_date < datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1))
+        except ValueError:
+            raise ValueError(f"Invalid end_date format: {end_date}")
+
+    product_id = args.get("product_id", type=int)
+    if product_id:
+        conditions.append(Sale.product_id == product_id)
+
+    if args.get("payment_method"):
+        conditions.append(Sale.payment_method == args["payment_method"])
+
+    if args.get("sale_status"):
+        conditions.append(Sale.sale_status == args["sale_status"])
+
+    return conditions
+
+
+# ================== KEYSET CURSOR ==================
+def encode_cursor(date, row_id):
+    """Opaque cursor for the position after (date, id); shared by the sales and order listings"""
+    return base64.urlsafe_b64encode(f"{date.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor"""
+    try:
+        date, row_id = base64.urlsafe_b64decode(token.encode()).decode().split("|")
+        return datetime.fromisoformat(date), int(row_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {token}")
+
+
+def keyset_sales_page(query, cursor, per_page):
+    """One page of `query` in (sale_date DESC, id) order, starting after `cursor`
+
+    The `sale_date <= :d` term is redundant with the OR but lets the
+    (sale_date DESC, id) index seek straight to the cursor position, so a deep
+    page costs the same as the first one.
+    """
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        query = query.filter(
+            Sale.sale_date <= last_date,
+            db.or_(Sale.sale_date < last_date, Sale.id > last_id)
+        )
+
+    rows = query.order_by(Sale.sale_date.desc(), Sale.id).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = encode_cursor(rows[-1].sale_date, rows[-1].id) if has_next else None
+    return rows, next_cursor
+
+
+# ================== COUNTS ==================
+class CountCache:
+    """Short-lived cache of sales counts keyed by the filter query string"""
+
+    def __init__(self, ttl=COUNT_CACHE_TTL, max_entries=COUNT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+            return None
+
+    def put(self, key, count):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (count, time.monotonic() + self.ttl)
+
+
+count_cache = CountCache()
+
+
+def count_sales(conditions):
+    """Exact COUNT(*) over sale only (no joins), so it can be answered from an index"""
+    return db.session.scalar(db.select(db.func.count()).select_from(Sale).where(*conditions))
+
+
+def estimate_sales(conditions, cache_key):
+    """Cheap approximate count
+
+    Unfiltered: PostgreSQL's planner estimate, or MAX(id) - MIN(id) + 1 elsewhere
+    (two primary key lookups). Filtered: falls back to the cached count.
+    """
+    if conditions:
+        return cached_count_sales(conditions, cache_key)
+    if db.session.get_bind().dialect.name == "postgresql":
+        estimate = db.session.scalar(db.text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'sale'"))
+        if estimate is not None and estimate >= 0:
+            return estimate
+    # Separate statements: SQLite only optimises a lone MIN() or MAX() into an index lookup
+    high = db.session.scalar(db.select(db.func.max(Sale.id)))
+    if high is None:
+        return 0
+    return high - db.session.scalar(db.select(db.func.min(Sale.id))) + 1
+
+
+def cached_count_sales(conditions, cache_key):
+    count = count_cache.get(cache_key)
+    if count is None:
+        count = count_sales(conditions)
+        count_cache.put(cache_key, count)
+    return count
+
+
+def total_sales(conditions, mode, cache_key):
+    """Total for the filtered sales in the requested mode (None when the mode is "none")"""
+    if mode == "exact":
+        return count_sales(conditions)
+    if mode == "cached":
+        return cached_count_sales(conditions, cache_key)
+    if mode == "estimate":
+        return estimate_sales(conditions, cache_key)
+    return None
+
+
+# ================== EXPORT ==================
+def export_sales(conditions, fmt="csv"):
+    """Stream matching sales, oldest first, as CSV or NDJSON
+
+    Selects plain columns (no ORM objects) joined to product and category and
+    pulls them through a server-side cursor EXPORT_BATCH_SIZE rows at a time,
+    so memory stays flat however many rows are exported.
+    """
+    statement = (
+        db.select(
+            Sale.id, Sale.sale_date, Sale.product_id, Product.name.label("product_name"),
+            Category.name.label("category_name"), Sale.quantity_sold, Sale.total_price,
+            Sale.payment_method, Sale.sale_status,
+        )
+        .join(Product, Product.id == Sale.product_id)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .where(*conditions)
+        .order_by(Sale.sale_date, Sale.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for partition in db.session.execute(statement).partitions():
+            for row in partition:
+                writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    def generate_ndjson():
+        for partition in db.session.execute(statement).partitions():
+            yield "".join(json.dumps(row._asdict(), default=str) + "\n" for row in partition)
+
+    if fmt == "ndjson":
+        return Response(stream_with_context(generate_ndjson()), mimetype="application/x-ndjson")
+    return Response(stream_with_context(generate_csv()), mimetype="text/csv")
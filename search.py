@@ -0,0 +1,81 @@
+from models import db, Category, Product
+from serializers import product_query
+import re
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+SEARCH_CANDIDATES = 500  # Matches ranked per query; caps the cost of broad queries like "b"
+
+# Column weights for bm25(): name matches rank above category, category above size.
+# bm25() is only computed for the first :candidates matches (in rowid order), so a
+# query matching most of the catalog costs the same as one matching 500 products;
+# such a query returns the best of those candidates rather than of every match.
+RANKED_SEARCH_SQL = db.text("""
+    SELECT rowid FROM (
+        SELECT rowid, bm25(product_fts, 10.0, 1.0, 3.0) AS score FROM product_fts
+        WHERE product_fts MATCH :match
+        LIMIT :candidates
+    )
+    ORDER BY score
+    LIMIT :limit
+""")
+
+
+def build_match_query(q):
+    """Turn free text into an FTS5 MATCH expression
+
+    Every word becomes a quoted prefix term ("red" "gla" -> "red"* "gla"*) so
+    partially typed words match (type-ahead) and FTS5 operators in user input
+    are never interpreted. Returns None if there is nothing to search for.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_terms(q):
+    return re.findall(r"\w+", q.lower())
+
+
+def search_products(q, limit=DEFAULT_SEARCH_LIMIT):
+    """Return products matching `q`, best match first"""
+    if db.session.get_bind().dialect.name != "sqlite":
+        return like_search(q, limit)  # The FTS5 index (and its migration) only exists on SQLite
+
+    match = build_match_query(q)
+    if match is None:
+        return []
+
+    ids = db.session.execute(
+        RANKED_SEARCH_SQL, {"match": match, "candidates": max(limit, SEARCH_CANDIDATES), "limit": limit}
+    ).scalars().all()
+    if not ids:
+        return []
+
+    # Load the matched rows in one query, then restore the ranking order
+    products = {p.id: p for p in product_query().filter(Product.id.in_(ids))}
+    return [products[i] for i in ids if i in products]
+
+
+def like_search(q, limit=DEFAULT_SEARCH_LIMIT):
+    """Search without the FTS index (e.g. on PostgreSQL)
+
+    Every word must appear in the name, size or category name; products whose
+    name contains every word come first, then alphabetical. Not indexed, so it
+    scans the product table.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+
+    query = product_query().outerjoin(Category, Product.category_id == Category.id)
+    for term in terms:
+        query = query.filter(db.or_(
+            Product.name.icontains(term, autoescape=True),
+            Product.size.icontains(term, autoescape=True),
+            Category.name.icontains(term, autoescape=True),
+        ))
+    name_match = db.and_(*[Product.name.icontains(term, autoescape=True) for term in terms])
+    return query.order_by(db.case((name_match, 0), else_=1), Product.name, Product.id).limit(limit).all()
@@ -0,0 +1,112 @@
+from sqlalchemy.orm import joinedload
+from models import db, Product, Sale, order_product
+
+# ================== EAGER-LOADED QUERIES ==================
+# List endpoints must go through these so related rows come back in the same
+# SELECT (many-to-one joins) instead of one lazy load per row.
+
+def product_query():
+    """Product query with its category joined in"""
+    return Product.query.options(joinedload(Product.category))
+
+
+def sale_query():
+    """Sale query with its product and the product's category joined in"""
+    return Sale.query.options(joinedload(Sale.product).joinedload(Product.category))
+
+
+# ================== SERIALIZERS ==================
+def category_name(product):
+    return product.category.name if product.category else None
+
+
+def serialize_product(p):
+    return {
+        "id": p.id, "name": p.name, "category": category_name(p),
+        "stock": p.stock_quantity, "price": p.selling_price
+    }
+
+
+def serialize_inventory_item(p):
+    return {"id": p.id, "name": p.name, "stock_quantity": p.stock_quantity}
+
+
+def serialize_stock_level(p):
+    return {"name": p.name, "category": category_name(p), "stock_quantity": p.stock_quantity}
+
+
+def serialize_low_stock_item(p):
+    return {
+        "id": p.id, "name": p.name, "category": category_name(p),
+        "stock_quantity": p.stock_quantity, "low_stock_threshold": p.low_stock_threshold
+    }
+
+
+def serialize_category(c):
+    return {
+        "id": c.id,
+        "name": c.name,
+        "description": c.description,
+        "created_at": c.created_at,
+        "updated_at": c.updated_at
+    }
+
+
+def serialize_sale(sale):
+    """Sale with unit price, profit and a product summary (as returned by /sales/all)"""
+    product = sale.product
+    unit_price = sale.total_price / sale.quantity_sold if sale.quantity_sold > 0 else 0
+    profit = sale.total_price - (product.selling_price * sale.quantity_sold) if product else 0
+
+    return {
+        "id": sale.id,
+        "sale_date": sale.sale_date,
+        "quantity_sold": sale.quantity_sold,
+        "total_price": sale.total_price,
+        "payment_method": sale.payment_method,
+        "sale_status": sale.sale_status,
+        "unit_price": unit_price,
+        "profit": profit,
+        "product": {
+            "id": product.id,
+            "name": product.name,
+            "category_id": product.category_id,
+            "category_name": category_name(product),
+            "selling_price": product.selling_price,
+            "stock_quantity": product.stock_quantity
+        } if product else None
+    }
+
+
+def serialize_orders(orders):
+    """Serialize a page of orders with their line items
+
+    All line items for the page are fetched with one IN-list query over
+    order_product joined to product, instead of one lazy load per order.
+    """
+    lines = {order.id: [] for order in orders}
+    if lines:
+        rows = db.session.execute(
+            db.select(
+                order_product.c.order_id, order_product.c.quantity,
+                Product.id, Product.name, Product.selling_price
+            )
+            .join(Product, Product.id == order_product.c.product_id)
+            .where(order_product.c.order_id.in_(lines))
+        )
+        for row in rows:
+            lines[row.order_id].append({
+                "product_id": row.id,
+                "name": row.name,
+                "quantity": row.quantity,
+                "price": row.selling_price
+            })
+
+    return [{
+        "id": o.id,
+        "customer_name": o.customer_name,
+        "order_status": o.order_status,
+        "order_date": o.order_date,
+        "shipping_info": o.shipping_info,
+        "items": lines[o.id]
+    } for o in orders]
@@ -0,0 +1,225 @@
+from models import db, Product, DEFAULT_LOW_STOCK_THRESHOLD, LOW_STOCK_CONDITION
+from worker_sync import worker_sync
+import threading
+
+UPDATE_CHUNK_SIZE = 500  # Products per UPDATE statement (keeps bound parameters well under SQLite's limit)
+
+
+class StockError(Exception):
+    """Raised when a stock change cannot be applied; carries a JSON-ready payload"""
+
+    def __init__(self, message, status=400, **details):
+        super().__init__(message)
+        self.status = status
+        self.payload = {"error": message, **details}
+
+
+def chunks(items, size=UPDATE_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def is_low_stock(stock_quantity, low_stock_threshold):
+    threshold = low_stock_threshold if low_stock_threshold is not None else DEFAULT_LOW_STOCK_THRESHOLD
+    return stock_quantity < threshold
+
+
+def low_stock_filter():
+    """WHERE clause selecting low-stock products; answered from the ix_product_low_stock partial index"""
+    return db.text(LOW_STOCK_CONDITION)
+
+
+class LowStockTracker:
+    """In-process set of the products currently below their low-stock threshold
+
+    Every stock change is reported through update(), which returns True only
+    when the product crosses from normal into low stock. Further sales while
+    it stays low return False, and restocking to the threshold or above
+    re-arms it, so each crossing raises exactly one alert. Transitions are
+    published through `sync`, so the other workers learn that the product is
+    already low (or restocked) and don't alert it again. Two workers crossing
+    the same product at the same instant may both alert.
+    """
+
+    def __init__(self, sync=worker_sync):
+        self.low = set()
+        self._lock = threading.Lock()
+        self.sync = sync
+        sync.register("low_stock", self._apply)
+
+    def update(self, product_id, stock_quantity, low_stock_threshold):
+        """Record a new stock level; True if the product has just become low"""
+        low = is_low_stock(stock_quantity, low_stock_threshold)
+        with self._lock:
+            changed = low != (product_id in self.low)
+            if changed:
+                self._set(product_id, low)
+        if changed:
+            self.sync.publish("low_stock", {"product_id": product_id, "low": low})
+        return changed and low
+
+    def discard(self, product_id):
+        with self._lock:
+            self.low.discard(product_id)
+        self.sync.publish("low_stock", {"product_id": product_id, "low": False})
+
+    def _set(self, product_id, low):
+        if low:
+            self.low.add(product_id)
+        else:
+            self.low.discard(product_id)
+
+    def _apply(self, payload):
+        with self._lock:
+            self._set(payload["product_id"], payload["low"])
+
+    def warm(self):
+        """Load the products that are already low, so a restart doesn't re-alert them; returns the count"""
+        ids = set(db.session.scalars(db.select(Product.id).where(low_stock_filter())))
+        with self._lock:
+            self.low = ids
+        return len(ids)
+
+
+low_stock_tracker = LowStockTracker()
+
+
+def decrement_stock(product_id, quantity):
+    """Atomically take `quantity` units of a product if enough are in stock
+
+    A single conditional `UPDATE .. WHERE stock_quantity >= :n` does the check
+    and the write, so concurrent checkouts can never oversell and the write
+    lock is held for one statement instead of a read-modify-write. Returns the
+    remaining stock, or None if there was not enough (or no such product).
+    """
+    return db.session.execute(
+        db.update(Product)
+        .where(Product.id == product_id, Product.stock_quantity >= quantity)
+        .values(stock_quantity=Product.stock_quantity - quantity)
+        .returning(Product.stock_quantity)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+
+
+def decrement_stock_bulk(quantities):
+    """Take stock for many products at once, all or nothing
+
+    `quantities` maps product id -> units. Each chunk is one conditional
+    UPDATE (`.. WHERE id IN (..) AND stock_quantity >= CASE id ..`) and the
+    RETURNING rows tell which products had enough. Returns {id: remaining};
+    raises StockError listing the short products otherwise, in which case the
+    caller must roll back.
+    """
+    remaining = {}
+    for chunk in chunks(list(quantities)):
+        needed = db.case({i: quantities[i] for i in chunk}, value=Product.id)
+        remaining.update(db.session.execute(
+            db.update(Product)
+            .where(Product.id.in_(chunk), Product.stock_quantity >= needed)
+            .values(stock_quantity=Product.stock_quantity - needed)
+            .returning(Product.id, Product.stock_quantity)
+            .execution_options(synchronize_session=False)
+        ).all())
+
+    short = [i for i in quantities if i not in remaining]
+    if short:
+        available = dict(db.session.execute(
+            db.select(Product.id, Product.stock_quantity).where(Product.id.in_(short))
+        ).all())
+        raise StockError("Insufficient stock", insufficient=[
+            {"product_id": i, "available": available.get(i, 0), "requested": quantities[i]} for i in short
+        ])
+    return remaining
+
+
+def release_stock(quantities):
+    """Put reserved units back ({product id: units}), one UPDATE per chunk
+
+    Returns the updated rows (id, name, category_id, stock_quantity, low_stock_threshold).
+    """
+    rows = []
+    for chunk in chunks(list(quantities)):
+        rows.extend(db.session.execute(
+            db.update(Product)
+            .where(Product.id.in_(chunk))
+            .values(stock_quantity=Product.stock_quantity + db.case({i: quantities[i] for i in chunk}, value=Product.id))
+            .returning(Product.id, Product.name, Product.category_id, Product.stock_quantity, Product.low_stock_threshold)
+            .execution_options(synchronize_session=False)
+        ).all())
+    return rows
+
+
+def merge_adjustments(adjustments):
+    """Collapse a list of {"id", "delta"|"stock"} items into {id: ("set"|"add", n)}
+
+    Entries are applied in order: "stock" sets an absolute count (replacing
+    anything earlier for that product) and "delta" adds to it.
+    """
+    merged = {}
+    for index, item in enumerate(adjustments):
+        if not isinstance(item, dict) or "id" not in item or ("delta" in item) == ("stock" in item):
+            raise StockError("Each adjustment needs an id and exactly one of delta or stock", index=index)
+        try:
+            product_id = int(item["id"])
+            value = int(item["delta"] if "delta" in item else item["stock"])
+        except (TypeError, ValueError):
+            raise StockError("id, delta and stock must be integers", index=index)
+
+        if "stock" in item:
+            merged[product_id] = ("set", value)
+        else:
+            mode, current = merged.get(product_id, ("add", 0))
+            merged[product_id] = (mode, current + value)
+    return merged
+
+
+def apply_stock_adjustments(adjustments):
+    """Apply many stock changes with set-based UPDATEs in the caller's transaction
+
+    Each chunk of products is changed by at most two statements:
+    `SET stock_quantity = CASE id WHEN .. THEN n END` for absolute counts and
+    `SET stock_quantity = stock_quantity + CASE id WHEN .. THEN d END` for deltas.
+    Returns the updated rows (id, name, category_id, stock_quantity, low_stock_threshold).
+    The caller commits, or rolls back on StockError.
+    """
+    merged = merge_adjustments(adjustments)
+    if not merged:
+        raise StockError("No adjustments provided")
+
+    ids = list(merged)
+    found = set()
+    for chunk in chunks(ids):
+        found.update(db.session.scalars(db.select(Product.id).where(Product.id.in_(chunk))))
+    missing = [product_id for product_id in ids if product_id not in found]
+    if missing:
+        raise StockError("Product not found", status=404, missing=missing)
+
+    for chunk in chunks(ids):
+        absolute = {i: merged[i][1] for i in chunk if merged[i][0] == "set"}
+        deltas = {i: merged[i][1] for i in chunk if merged[i][0] == "add"}
+        if absolute:
+            db.session.execute(
+                db.update(Product)
+                .where(Product.id.in_(absolute))
+                .values(stock_quantity=db.case(absolute, value=Product.id))
+                .execution_options(synchronize_session=False)
+            )
+        if deltas:
+            db.session.execute(
+                db.update(Product)
+                .where(Product.id.in_(deltas))
+                .values(stock_quantity=Product.stock_quantity + db.case(deltas, value=Product.id))
+                .execution_options(synchronize_session=False)
+            )
+
+    rows = []
+    for chunk in chunks(ids):
+        rows.extend(db.session.execute(
+            db.select(Product.id, Product.name, Product.category_id, Product.stock_quantity, Product.low_stock_threshold)
+            .where(Product.id.in_(chunk))
+        ).all())
+
+    negative = [row.id for row in rows if row.stock_quantity < 0]
+    if negative:
+        raise StockError("Adjustment would make stock negative", status=409, products=negative)
+    return rows
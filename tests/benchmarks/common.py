@@ -0,0 +1,38 @@
+"""Helpers shared by the benchmark scripts
+
+The scripts in this folder are run by hand (they are not collected by
+pytest) and each works on a scratch copy of the bundled database.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+
+def scratch_database():
+    """Copy instance/inventory.db to a temp dir, point DATABASE_URL at it and migrate it; returns its path"""
+    path = os.path.join(tempfile.mkdtemp(prefix="beads-bench-"), "inventory.db")
+    shutil.copy(os.path.join(ROOT, "instance", "inventory.db"), path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.pop("SOCKETIO_MESSAGE_QUEUE", None)
+    # Migrated in a child process so the script can still monkey patch before it imports the app
+    subprocess.run([sys.executable, "-m", "flask", "--app", "app", "db", "upgrade"],
+                   cwd=ROOT, check=True, capture_output=True)
+    return path
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def summary(latencies):
+    """p50 / p99 / max of a list of seconds, in milliseconds"""
+    if not latencies:
+        return "no samples"
+    return (f"p50 {percentile(latencies, 50) * 1000:.1f} ms, p99 {percentile(latencies, 99) * 1000:.1f} ms, "
+            f"max {max(latencies) * 1000:.1f} ms ({len(latencies)} requests)")
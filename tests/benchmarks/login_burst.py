@@ -0,0 +1,99 @@
+"""Latency of other requests on one gevent worker while a burst of logins runs
+
+A probe polls GET / every 10 ms, first on an idle server, then while
+--logins concurrent POST /admin/login requests verify bcrypt hashes at
+--rounds. Run with --inline to hash on the gevent hub (the behaviour before
+passwords.run_blocking) for comparison:
+
+    python tests/benchmarks/login_burst.py
+    python tests/benchmarks/login_burst.py --inline
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+from common import scratch_database, summary
+
+PROBE_INTERVAL = 0.01
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=16, help="concurrent logins in the burst")
+    parser.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS of the admin hash")
+    parser.add_argument("--idle", type=float, default=1.0, help="seconds of probing before the burst")
+    parser.add_argument("--inline", action="store_true", help="hash on the gevent hub instead of the thread pool")
+    args = parser.parse_args()
+
+    scratch_database()
+    # Let every login of the burst through the throttle; this measures the hashing, not the limits
+    os.environ.update({
+        "BCRYPT_ROUNDS": str(args.rounds), "LOGIN_MAX_CONCURRENT": str(args.logins),
+        "LOGIN_USER_BURST": str(args.logins), "LOGIN_IP_BURST": str(args.logins),
+    })
+
+    import gevent
+    from gevent.pywsgi import WSGIServer
+    import passwords
+    from app import app
+    from models import db, User
+
+    with app.app_context():
+        db.session.execute(db.update(User).where(User.username == "admin")
+                           .values(password=passwords.hash_password("admin123")))
+        db.session.commit()
+    if args.inline:
+        passwords.run_blocking = lambda func, *func_args: func(*func_args)
+
+    server = WSGIServer(("127.0.0.1", 0), app, log=None)
+    server.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    def probe(latencies, stop):
+        while not stop():
+            started = time.perf_counter()
+            urllib.request.urlopen(f"{base}/").read()
+            latencies.append(time.perf_counter() - started)
+            gevent.sleep(PROBE_INTERVAL)
+
+    def login():
+        request = urllib.request.Request(
+            f"{base}/admin/login", data=json.dumps({"username": "admin", "password": "admin123"}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            return urllib.request.urlopen(request).status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    idle = []
+    deadline = time.monotonic() + args.idle
+    probe(idle, lambda: time.monotonic() > deadline)
+
+    during, done = [], []
+    prober = gevent.spawn(probe, during, lambda: done)
+    started = time.perf_counter()
+    logins = [gevent.spawn(login) for _ in range(args.logins)]
+    gevent.joinall(logins)
+    elapsed = time.perf_counter() - started
+    done.append(True)
+    prober.join()
+    server.stop()
+
+    mode = "inline on the hub" if args.inline else "thread pool"
+    print(f"bcrypt cost {args.rounds}, {args.logins} concurrent logins, hashing {mode}")
+    print(f"  logins: {dict(Counter(g.value for g in logins))} in {elapsed:.2f} s")
+    print(f"  GET / idle:         {summary(idle)}")
+    print(f"  GET / during burst: {summary(during)}")
+
+
+if __name__ == "__main__":
+    main()
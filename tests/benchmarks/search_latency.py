@@ -0,0 +1,64 @@
+"""/products/search latency on a large catalog
+
+Fills a scratch database with --products generated products (the FTS
+triggers index them as they are inserted), then times each query through
+the Flask test client, bypassing the catalog cache:
+
+    python tests/benchmarks/search_latency.py --products 100000
+"""
+import argparse
+import random
+import sqlite3
+import time
+
+from common import scratch_database, summary
+
+COLORS = ["red", "blue", "green", "black", "white", "gold", "silver", "amber", "ruby", "teal"]
+MATERIALS = ["glass", "wood", "metal", "seed", "crystal", "pearl", "bone", "clay", "acrylic", "stone"]
+SHAPES = ["round", "bicone", "cube", "drop", "tube", "heart", "star", "rondelle", "coin", "oval"]
+SIZES = ["2mm", "4mm", "6mm", "8mm", "10mm", "12mm"]
+CATEGORIES = ["Beads", "Findings", "Charms", "Pendants", "Spacers"]
+
+# Broad single letters, common words, multi-word and rare queries
+QUERIES = ["b", "g", "bead", "glass", "red glass", "gold round 6mm", "crystal bicone", "pearl drop", "zircon"]
+
+
+def fill(path, count):
+    rng = random.Random(42)
+    with sqlite3.connect(path) as conn:
+        category_ids = [conn.execute("INSERT INTO category (name) VALUES (?)", (name,)).lastrowid
+                        for name in CATEGORIES]
+        conn.executemany(
+            "INSERT INTO product (name, category_id, size, stock_quantity, selling_price, low_stock_threshold) "
+            "VALUES (?, ?, ?, 100, 1.0, 10)",
+            ([f"{rng.choice(COLORS)} {rng.choice(MATERIALS)} {rng.choice(SHAPES)} beads",
+              rng.choice(category_ids), rng.choice(SIZES)] for _ in range(count)),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per query")
+    args = parser.parse_args()
+
+    path = scratch_database()
+    fill(path, args.products)
+
+    from app import app
+    from catalog_cache import catalog_cache
+
+    client = app.test_client()
+    print(f"{args.products} products")
+    for q in QUERIES:
+        latencies = []
+        for _ in range(args.repeat):
+            catalog_cache.bump()  # Measure the search, not the response cache
+            started = time.perf_counter()
+            response = client.get("/products/search", query_string={"q": q})
+            latencies.append(time.perf_counter() - started)
+        print(f"  {q!r:18} {len(response.get_json()):3} results  {summary(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
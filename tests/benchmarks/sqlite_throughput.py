@@ -0,0 +1,84 @@
+"""Requests per second against one SQLite file from several worker processes
+
+Each process drives the app with the Flask test client for --seconds:
+writers POST /sales, readers GET /sales/all. Compare the rollback journal
+(the behaviour before database.SQLITE_PRAGMAS) with WAL:
+
+    python tests/benchmarks/sqlite_throughput.py --journal-mode DELETE
+    python tests/benchmarks/sqlite_throughput.py --journal-mode WAL
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import time
+
+from common import scratch_database
+
+SALE = {"quantity_sold": 1, "total_price": 1.0, "payment_method": "cash", "sale_status": "completed"}
+
+
+def create_product(path):
+    """A product with enough stock that no writer ever runs out"""
+    with sqlite3.connect(path) as conn:
+        category_id = conn.execute("INSERT INTO category (name) VALUES ('Benchmark')").lastrowid
+        return conn.execute(
+            "INSERT INTO product (name, category_id, stock_quantity, selling_price, low_stock_threshold) "
+            "VALUES ('Benchmark beads', ?, 1000000000, 1.0, 10)", (category_id,)
+        ).lastrowid
+
+
+def worker(role, product_id, seconds, start, results):
+    from app import app  # Imported after the fork so every process has its own engine
+
+    client = app.test_client()
+    ok = errors = 0
+    start.wait()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if role == "writer":
+            response = client.post("/sales", json={"product_id": product_id, **SALE})
+        else:
+            response = client.get("/sales/all?per_page=20")
+        if response.status_code < 400:
+            ok += 1
+        else:
+            errors += 1
+    results.put((role, ok, errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--journal-mode", default="WAL", help="SQLITE_JOURNAL_MODE for every connection")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=8.0)
+    args = parser.parse_args()
+
+    os.environ["SQLITE_JOURNAL_MODE"] = args.journal_mode
+    path = scratch_database()
+    product_id = create_product(path)
+
+    context = multiprocessing.get_context("fork")
+    roles = ["writer"] * args.writers + ["reader"] * args.readers
+    start = context.Barrier(len(roles))
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(role, product_id, args.seconds, start, results))
+                 for role in roles]
+    for process in processes:
+        process.start()
+    totals = {}
+    for _ in processes:
+        role, ok, errors = results.get()
+        done, failed = totals.get(role, (0, 0))
+        totals[role] = (done + ok, failed + errors)
+    for process in processes:
+        process.join()
+
+    print(f"journal_mode={args.journal_mode}, {args.writers} writers + {args.readers} readers, {args.seconds:g} s")
+    for role, (ok, errors) in sorted(totals.items()):
+        print(f"  {role}s: {ok / args.seconds:.1f} requests/s, {errors} errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The app reads its database and queue settings at import time, so point it at
+# a scratch copy of the bundled database before anything imports it
+TMP_DIR = tempfile.mkdtemp(prefix="beads-tests-")
+DB_PATH = os.path.join(TMP_DIR, "inventory.db")
+shutil.copy(os.path.join(ROOT, "instance", "inventory.db"), DB_PATH)
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.pop("SOCKETIO_MESSAGE_QUEUE", None)
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The Flask app on a temporary SQLite file migrated to the latest revision"""
+    from flask_migrate import upgrade
+    from app import app as flask_app
+
+    with flask_app.app_context():
+        upgrade(directory=os.path.join(ROOT, "migrations"))
+    yield flask_app
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity="admin", additional_claims={"role": "admin"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def make_products(app):
+    """Insert a category with `count` products; returns their ids"""
+    from models import db, Category, Product
+
+    def make(count, stock_quantity=100, low_stock_threshold=10):
+        with app.app_context():
+            category = Category(name=f"Test category {next(_names)}")
+            db.session.add(category)
+            db.session.commit()
+            db.session.execute(Product.__table__.insert(), [{
+                "name": f"Product {i}", "category_id": category.id, "stock_quantity": stock_quantity,
+                "selling_price": 1.0, "low_stock_threshold": low_stock_threshold,
+            } for i in range(count)])
+            db.session.commit()
+            return category.id, list(db.session.scalars(
+                db.select(Product.id).where(Product.category_id == category.id).order_by(Product.id)
+            ))
+    return make
+
+
+_names = iter(range(10 ** 9))
@@ -0,0 +1,22 @@
+import uuid
+
+from flask_jwt_extended import create_access_token
+
+from models import db, User
+from passwords import hash_password
+
+
+def test_demoted_token_stops_working_on_the_next_request(app, client, auth_headers):
+    username = f"user-{uuid.uuid4().hex[:8]}"
+    with app.app_context():
+        db.session.add(User(username=username, password=hash_password("secret"), role="admin"))
+        db.session.commit()
+        token = create_access_token(identity=username, additional_claims={"role": "admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/inventory/low-stock", headers=headers).status_code == 200  # Cached as admin
+
+    response = client.put(f"/admin/users/{username}/role", json={"role": "user"}, headers=auth_headers)
+    assert response.status_code == 200
+
+    assert client.get("/inventory/low-stock", headers=headers).status_code == 401
@@ -0,0 +1,18 @@
+import pytest
+
+from bulk_import import validate_record
+
+RECORD = {"name": "Seed beads", "category_id": "1", "stock_quantity": "5", "selling_price": "2.5"}
+
+
+@pytest.mark.parametrize("value, expected", [(None, 10), ("", 10), ("0", 0), (0, 0), ("3", 3)])
+def test_low_stock_threshold(value, expected):
+    row, error = validate_record({**RECORD, "low_stock_threshold": value}, {1})
+    assert error is None
+    assert row["low_stock_threshold"] == expected
+
+
+def test_missing_low_stock_threshold_uses_default():
+    row, error = validate_record(RECORD, {1})
+    assert error is None
+    assert row["low_stock_threshold"] == 10
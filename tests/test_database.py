@@ -0,0 +1,29 @@
+from sqlalchemy import create_engine
+
+from database import READ_BIND, SQLITE_PRAGMAS
+from models import db
+
+
+def pragma(conn, name):
+    return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def test_new_sqlite_connection_is_tuned(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    try:
+        with engine.connect() as conn:
+            assert pragma(conn, "journal_mode") == "wal"
+            assert pragma(conn, "busy_timeout") == SQLITE_PRAGMAS["busy_timeout"]
+    finally:
+        engine.dispose()
+
+
+def test_app_engines_are_tuned(app):
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert pragma(conn, "journal_mode") == "wal"
+            assert pragma(conn, "busy_timeout") == SQLITE_PRAGMAS["busy_timeout"]
+        # The read-only engine can't change the journal mode but reads the WAL file and waits on locks the same way
+        with db.engines[READ_BIND].connect() as conn:
+            assert pragma(conn, "journal_mode") == "wal"
+            assert pragma(conn, "busy_timeout") == SQLITE_PRAGMAS["busy_timeout"]
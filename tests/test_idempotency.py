@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+import hashlib
+import json
+import uuid
+
+import pytest
+
+from idempotency import DEFAULT_CLAIM_TIMEOUT
+from models import db, IdempotencyKey, Sale
+
+
+@pytest.fixture
+def key():
+    return uuid.uuid4().hex
+
+
+@pytest.fixture
+def product_id(make_products):
+    _, (product_id,) = make_products(1)
+    return product_id
+
+
+def sale(product_id, quantity_sold=1):
+    return {"product_id": product_id, "quantity_sold": quantity_sold, "total_price": 2.5,
+            "payment_method": "cash", "sale_status": "completed"}
+
+
+def sale_count(app, product_id):
+    with app.app_context():
+        return db.session.scalar(db.select(db.func.count(Sale.id)).where(Sale.product_id == product_id))
+
+
+def claim(app, key, body, claimed_seconds_ago):
+    """A claim left by a request that is still running (or died) without storing a response"""
+    with app.app_context():
+        claimed_at = datetime.utcnow() - timedelta(seconds=claimed_seconds_ago)
+        db.session.add(IdempotencyKey(
+            key=key, endpoint="create_sale", request_hash=hashlib.sha256(json.dumps(body).encode()).hexdigest(),
+            created_at=claimed_at, claimed_at=claimed_at,
+        ))
+        db.session.commit()
+
+
+def post_sale(client, key, body):
+    # Sent as pre-encoded JSON so the request hash matches claim()
+    return client.post("/sales", data=json.dumps(body), content_type="application/json",
+                       headers={"Idempotency-Key": key})
+
+
+def test_retry_replays_the_stored_response(app, client, key, product_id):
+    first = post_sale(client, key, sale(product_id))
+    second = post_sale(client, key, sale(product_id))
+
+    assert first.status_code == second.status_code == 201
+    assert second.get_json() == first.get_json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert sale_count(app, product_id) == 1
+
+
+def test_same_key_with_a_different_body_is_rejected(app, client, key, product_id):
+    assert post_sale(client, key, sale(product_id)).status_code == 201
+    response = post_sale(client, key, sale(product_id, quantity_sold=2))
+    assert response.status_code == 422
+    assert sale_count(app, product_id) == 1
+
+
+def test_retry_while_the_first_request_runs_gets_409(app, client, key, product_id):
+    claim(app, key, sale(product_id), claimed_seconds_ago=1)
+    response = post_sale(client, key, sale(product_id))
+    assert response.status_code == 409
+    assert sale_count(app, product_id) == 0
+
+
+def test_abandoned_claim_is_taken_over_after_the_lease(app, client, key, product_id):
+    claim(app, key, sale(product_id), claimed_seconds_ago=DEFAULT_CLAIM_TIMEOUT + 1)
+    response = post_sale(client, key, sale(product_id))
+    assert response.status_code == 201
+    assert sale_count(app, product_id) == 1
+
+    replayed = post_sale(client, key, sale(product_id))
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.get_json() == response.get_json()
+    assert sale_count(app, product_id) == 1
+
+
+def test_client_errors_are_stored_and_replayed(client, key):
+    missing = sale(10 ** 9)
+    assert post_sale(client, key, missing).status_code == 404
+    assert post_sale(client, key, missing).headers["Idempotent-Replayed"] == "true"
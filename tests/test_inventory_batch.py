@@ -0,0 +1,38 @@
+"""POST /inventory/batch notifies clients under the single-product event names"""
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Record what the endpoint hands to the broadcaster instead of queueing it"""
+    calls = []
+    monkeypatch.setattr(app_module.broadcaster, "publish",
+                        lambda event, payload, **rooms: calls.append((event, payload)))
+    return calls
+
+
+def test_batch_emits_one_stock_update_and_one_low_stock_alert(client, auth_headers, make_products, published):
+    _, (restocked, sold, sold_out) = make_products(3, stock_quantity=20, low_stock_threshold=10)
+
+    response = client.post("/inventory/batch", headers=auth_headers, json={"adjustments": [
+        {"id": restocked, "delta": 5},
+        {"id": sold, "delta": -15},
+        {"id": sold_out, "stock": 0},
+    ]})
+    assert response.status_code == 200, response.get_json()
+
+    assert [event for event, _ in published] == ["stock_update", "low_stock_alert"]
+    updates = {update["id"]: update["stock"] for update in published[0][1]["updates"]}
+    assert updates == {restocked: 25, sold: 5, sold_out: 0}
+    assert sorted(alert["id"] for alert in published[1][1]["alerts"]) == [sold, sold_out]
+
+
+def test_batch_without_new_low_stock_sends_no_alert(client, auth_headers, make_products, published):
+    _, ids = make_products(2, stock_quantity=20, low_stock_threshold=10)
+
+    response = client.post("/inventory/batch", headers=auth_headers,
+                           json={"adjustments": [{"id": i, "delta": 1} for i in ids]})
+    assert response.status_code == 200, response.get_json()
+    assert [event for event, _ in published] == ["stock_update"]
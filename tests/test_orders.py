@@ -0,0 +1,56 @@
+import pytest
+
+from models import db, Order, Product
+
+
+def order(*items, order_status="pending"):
+    return {"customer_name": "Ada", "order_status": order_status, "shipping_info": "1 Bead St",
+            "items": list(items)}
+
+
+def stock(app, product_id):
+    with app.app_context():
+        return db.session.scalar(db.select(Product.stock_quantity).where(Product.id == product_id))
+
+
+def set_status(app, order_id, status):
+    with app.app_context():
+        db.session.get(Order, order_id).order_status = status
+        db.session.commit()
+
+
+@pytest.mark.parametrize("product_id", ["1", [1], None, True])
+def test_create_order_rejects_non_integer_product_id(client, auth_headers, make_products, product_id):
+    _, (valid_id,) = make_products(1)
+    response = client.post("/orders", json=order({"product_id": valid_id}, {"product_id": product_id}),
+                           headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "product_id must be an integer", "index": 1}
+
+
+def test_cancel_releases_the_reservation_once(app, client, auth_headers, make_products):
+    _, (product_id,) = make_products(1, stock_quantity=10)
+    created = client.post("/orders", json=order({"product_id": product_id, "quantity": 4}), headers=auth_headers)
+    assert created.status_code == 201
+    order_id = created.get_json()["order_id"]
+    assert stock(app, product_id) == 6
+
+    assert client.post(f"/orders/{order_id}/cancel", headers=auth_headers).status_code == 200
+    assert stock(app, product_id) == 10
+    again = client.post(f"/orders/{order_id}/cancel", headers=auth_headers)
+    assert again.status_code == 409
+    assert stock(app, product_id) == 10
+
+
+@pytest.mark.parametrize("status", ["shipped", "completed"])
+def test_fulfilled_order_cannot_be_cancelled(app, client, auth_headers, make_products, status):
+    _, (product_id,) = make_products(1, stock_quantity=10)
+    order_id = client.post("/orders", json=order({"product_id": product_id, "quantity": 4}),
+                           headers=auth_headers).get_json()["order_id"]
+    set_status(app, order_id, status)
+
+    response = client.post(f"/orders/{order_id}/cancel", headers=auth_headers)
+    assert response.status_code == 409
+    assert stock(app, product_id) == 6
+    with app.app_context():
+        assert db.session.get(Order, order_id).order_status == status
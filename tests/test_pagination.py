@@ -0,0 +1,46 @@
+import pytest
+
+
+@pytest.mark.parametrize("path", ["/products", "/inventory", "/stock_levels", "/inventory/low-stock"])
+def test_malformed_cursor_is_rejected(client, auth_headers, path):
+    response = client.get(f"{path}?cursor=abc", headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid cursor"}
+
+
+@pytest.mark.parametrize("path", ["/products", "/inventory", "/stock_levels", "/inventory/low-stock"])
+def test_empty_cursor_starts_at_first_page(client, auth_headers, path):
+    response = client.get(f"{path}?cursor=&limit=2", headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.get_json()["items"]) <= 2
+
+
+def test_low_stock_pages_follow_the_unpaged_order(client, auth_headers, make_products):
+    make_products(5, stock_quantity=2)
+    make_products(5, stock_quantity=1)
+    expected = [item["id"] for item in client.get("/inventory/low-stock", headers=auth_headers).get_json()]
+
+    ids, cursor = [], ""
+    while cursor is not None:
+        page = client.get(f"/inventory/low-stock?limit=3&cursor={cursor}", headers=auth_headers).get_json()
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+    assert ids == expected
+
+
+def test_low_stock_cursor_needs_both_keys(client, auth_headers):
+    response = client.get("/inventory/low-stock?cursor=5", headers=auth_headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("per_page", [-1, 0])
+@pytest.mark.parametrize("mode", ["cursor=", "page=1"])
+def test_sales_per_page_is_clamped_to_one(client, auth_headers, make_products, per_page, mode):
+    _, (product_id,) = make_products(1)
+    for _ in range(2):
+        client.post("/sales", json={"product_id": product_id, "quantity_sold": 1, "total_price": 1,
+                                    "payment_method": "cash", "sale_status": "completed"})
+
+    response = client.get(f"/sales/all?product_id={product_id}&per_page={per_page}&{mode}", headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()["pagination"]["per_page"] == 1
@@ -0,0 +1,67 @@
+import threading
+import uuid
+
+import bcrypt
+import pytest
+
+from models import db, User
+from passwords import check_password, hash_password, needs_rehash, run_blocking
+
+
+@pytest.fixture
+def rounds(app, monkeypatch):
+    """Set BCRYPT_ROUNDS for the test (kept tiny so hashing is fast)"""
+    def set_rounds(value):
+        monkeypatch.setitem(app.config, "BCRYPT_ROUNDS", value)
+    set_rounds(4)
+    return set_rounds
+
+
+def test_hash_uses_the_configured_cost(app, rounds):
+    with app.app_context():
+        hashed = hash_password("secret")
+        assert hashed.startswith("$2b$04$")
+        assert check_password("secret", hashed)
+        assert not check_password("wrong", hashed)
+
+
+def test_needs_rehash_compares_the_cost(app, rounds):
+    with app.app_context():
+        hashed = hash_password("secret")
+        assert not needs_rehash(hashed)
+        rounds(5)
+        assert needs_rehash(hashed)
+
+
+@pytest.mark.parametrize("hashed", ["", "plain-text", "pbkdf2:sha256:600000$salt$hash", "$2b$xx$abc"])
+def test_unrecognised_hashes_need_rehash(app, hashed):
+    with app.app_context():
+        assert needs_rehash(hashed)
+
+
+def test_login_rehashes_at_a_changed_cost(app, client, rounds):
+    username = f"user-{uuid.uuid4().hex[:8]}"
+    with app.app_context():
+        db.session.add(User(username=username, password=hash_password("secret"), role="user"))
+        db.session.commit()
+
+    rounds(5)
+    response = client.post("/admin/login", json={"username": username, "password": "secret"})
+    assert response.status_code == 200
+
+    with app.app_context():
+        stored = db.session.scalar(db.select(User.password).where(User.username == username))
+    assert stored.startswith("$2b$05$")
+    assert bcrypt.checkpw(b"secret", stored.encode())
+    assert client.post("/admin/login", json={"username": username, "password": "secret"}).status_code == 200
+
+
+def test_run_blocking_uses_the_thread_pool_inside_a_greenlet(app):
+    gevent = pytest.importorskip("gevent")
+    caller = threading.get_ident()
+
+    with app.app_context():
+        assert run_blocking(threading.get_ident) == caller  # Plain call outside gevent
+        worker = gevent.spawn(run_blocking, threading.get_ident)
+        worker.join()
+    assert worker.value != caller
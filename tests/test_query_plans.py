@@ -0,0 +1,96 @@
+"""EXPLAIN QUERY PLAN checks for the indexed listing endpoints
+
+Every SELECT a request runs is re-planned with its real parameters; a bare
+"SCAN sale" / "SCAN product" (no USING INDEX) means a filter or ordering
+stopped matching the indexes and the query now reads the whole table.
+"""
+from contextlib import contextmanager
+import re
+
+import pytest
+from sqlalchemy import event
+
+from models import db
+
+BARE_SCAN = re.compile(r"^SCAN (sale|product)(_\d+)?$")
+
+
+@contextmanager
+def captured_selects(app):
+    """Collect (statement, parameters) of every SELECT run on any engine"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", capture)
+
+
+def bare_scans(app, statements):
+    scans = []
+    with app.app_context(), db.engine.connect() as conn:
+        for statement, parameters in statements:
+            for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters):
+                if BARE_SCAN.match(row[-1]):
+                    scans.append((row[-1], statement))
+    return scans
+
+
+def assert_indexed(app, client, url):
+    with captured_selects(app) as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.get_json()
+    assert statements, f"{url} ran no queries"
+    assert bare_scans(app, statements) == []
+
+
+@pytest.fixture
+def category_id(make_products):
+    category_id, _ = make_products(3)
+    return category_id
+
+
+@pytest.mark.parametrize("filters", [
+    "product_id=1",
+    "payment_method=cash",
+    "sale_status=completed",
+    "start_date=2024-01-01&end_date=2024-12-31",
+    "product_id=1&start_date=2024-01-01&end_date=2024-12-31",
+])
+@pytest.mark.parametrize("mode", ["page=1", "cursor="])
+def test_sales_listing_uses_indexes(app, client, auth_headers, filters, mode):
+    url = f"/sales/all?{filters}&{mode}"
+    with captured_selects(app) as statements:
+        response = client.get(url, headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+    assert bare_scans(app, statements) == []
+
+
+def test_products_by_category_uses_index(app, client, category_id):
+    assert_indexed(app, client, f"/products/category/{category_id}")
+
+
+def test_low_stock_pages_use_partial_index(app, client, auth_headers, make_products):
+    make_products(3, stock_quantity=1)
+    with captured_selects(app) as statements:
+        first = client.get("/inventory/low-stock?limit=2", headers=auth_headers)
+        cursor = first.get_json()["next_cursor"]
+        second = client.get(f"/inventory/low-stock?limit=2&cursor={cursor}", headers=auth_headers)
+    assert first.status_code == second.status_code == 200
+    assert cursor is not None
+    assert bare_scans(app, statements) == []
+
+    with app.app_context(), db.engine.connect() as conn:
+        for statement, parameters in statements:
+            if "FROM product" in statement and "LIMIT" in statement:
+                plan = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+                assert any("ix_product_low_stock" in detail for detail in plan), plan
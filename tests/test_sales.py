@@ -0,0 +1,66 @@
+import pytest
+
+from models import db, SalesDailyRollup
+
+
+def sale(product_id, **overrides):
+    return {"product_id": product_id, "quantity_sold": 1, "total_price": 2.5,
+            "payment_method": "cash", "sale_status": "completed", **overrides}
+
+
+def rollup_revenue(app, product_id):
+    with app.app_context():
+        return db.session.scalar(
+            db.select(db.func.sum(SalesDailyRollup.revenue)).where(SalesDailyRollup.product_id == product_id)
+        )
+
+
+@pytest.mark.parametrize("total_price", [2.5, "2.50", 2])
+def test_sale_accepts_numeric_total_price(app, client, make_products, total_price):
+    _, (product_id,) = make_products(1)
+    response = client.post("/sales", json=sale(product_id, total_price=total_price))
+    assert response.status_code == 201, response.get_json()
+    assert rollup_revenue(app, product_id) == float(total_price)
+
+
+@pytest.mark.parametrize("total_price", ["abc", None, [1], True, "nan"])
+def test_sale_rejects_non_numeric_total_price(client, make_products, total_price):
+    _, (product_id,) = make_products(1)
+    response = client.post("/sales", json=sale(product_id, total_price=total_price))
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "total_price must be a number"}
+
+
+def test_checkout_accepts_numeric_string_total_price(app, client, make_products):
+    _, (first, second) = make_products(2)
+    response = client.post("/sales/checkout", json={
+        "items": [{"product_id": first, "quantity_sold": 1, "total_price": "2.50"},
+                  {"product_id": second, "quantity_sold": 2, "total_price": 4}],
+        "payment_method": "cash", "sale_status": "completed",
+    })
+    assert response.status_code == 201, response.get_json()
+    assert rollup_revenue(app, first) == 2.5
+    assert rollup_revenue(app, second) == 4.0
+
+
+def test_checkout_rejects_non_numeric_total_price(client, make_products):
+    _, (product_id,) = make_products(1)
+    response = client.post("/sales/checkout", json={
+        "items": [{"product_id": product_id, "quantity_sold": 1, "total_price": 1},
+                  {"product_id": product_id, "quantity_sold": 1, "total_price": "two"}],
+        "payment_method": "cash", "sale_status": "completed",
+    })
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "total_price must be a number", "index": 1}
+
+
+@pytest.mark.parametrize("product_id", ["1", [1], None, True, 1.5])
+def test_checkout_rejects_non_integer_product_id(client, make_products, product_id):
+    _, (valid_id,) = make_products(1)
+    response = client.post("/sales/checkout", json={
+        "items": [{"product_id": valid_id, "quantity_sold": 1, "total_price": 1},
+                  {"product_id": product_id, "quantity_sold": 1, "total_price": 1}],
+        "payment_method": "cash", "sale_status": "completed",
+    })
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "product_id must be an integer", "index": 1}
@@ -0,0 +1,85 @@
+import random
+import string
+
+import pytest
+
+import search
+from models import db, Category, Product
+from search import like_search, search_products
+
+
+def word():
+    return "".join(random.choices(string.ascii_lowercase, k=10))
+
+
+@pytest.fixture
+def catalog(app):
+    """Two products in a new category: "category_match" only matches `word` through its category
+    name, "name_match" (inserted second) through its own name. Returns (word, other word, ids)."""
+    category_word, name_word = word(), word()
+    with app.app_context():
+        category = Category(name=f"{category_word} supplies")
+        db.session.add(category)
+        db.session.flush()
+        products = {
+            "category_match": Product(name=f"{name_word} glass bead", category_id=category.id,
+                                      stock_quantity=1, selling_price=1),
+            "name_match": Product(name=f"{category_word} charm", category_id=category.id,
+                                  stock_quantity=1, selling_price=1),
+        }
+        db.session.add_all(products.values())
+        db.session.commit()
+        yield category_word, name_word, {label: p.id for label, p in products.items()}
+
+
+@pytest.fixture(params=["fts", "like"])
+def find(request, app):
+    search_function = search_products if request.param == "fts" else like_search
+
+    def find(q, limit=20):
+        with app.app_context():
+            return [p.id for p in search_function(q, limit)]
+    return find
+
+
+def test_prefix_of_a_name_word_matches(find, catalog):
+    _, name_word, ids = catalog
+    assert find(name_word[:4]) == [ids["category_match"]]
+
+
+def test_every_word_must_match(find, catalog):
+    _, name_word, ids = catalog
+    assert find(f"{name_word} glass") == [ids["category_match"]]
+    assert find(f"{name_word} charm") == []
+
+
+def test_name_matches_rank_above_category_matches(find, catalog):
+    category_word, _, ids = catalog
+    assert find(category_word) == [ids["name_match"], ids["category_match"]]
+
+
+@pytest.mark.parametrize("q", ["", "   ", "%", "-*"])
+def test_queries_without_words_find_nothing(find, q):
+    assert find(q) == []
+
+
+def test_underscore_is_not_a_wildcard(find, catalog):
+    _, _, ids = catalog
+    assert not set(find("_")) & set(ids.values())
+
+
+def test_ranking_is_capped_to_the_first_candidates(app, catalog, monkeypatch):
+    category_word, _, ids = catalog
+    monkeypatch.setattr(search, "SEARCH_CANDIDATES", 1)
+    with app.app_context():
+        # Only the first match (lowest rowid) is ranked, even though the other has the better score
+        assert [p.id for p in search_products(category_word, limit=1)] == [ids["category_match"]]
+
+
+def test_other_databases_use_the_like_search(app, catalog, monkeypatch):
+    category_word, _, ids = catalog
+    with app.app_context():
+        postgres = type("Bind", (), {"dialect": type("Dialect", (), {"name": "postgresql"})})
+        monkeypatch.setattr(db.session, "get_bind", lambda *args, **kwargs: postgres)
+        monkeypatch.setattr(search, "RANKED_SEARCH_SQL", None)  # Any FTS query would now fail
+        assert [p.id for p in search_products(category_word)] == [ids["name_match"], ids["category_match"]]
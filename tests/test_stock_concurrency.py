@@ -0,0 +1,40 @@
+"""Concurrent checkouts against one file-backed SQLite database must never oversell"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from models import db, Product, Sale
+
+STOCK = 30
+THREADS = 8
+
+
+def test_concurrent_sales_never_oversell(app, make_products):
+    _, (product_id,) = make_products(1, stock_quantity=STOCK)
+    start = threading.Barrier(THREADS)
+
+    def sell_until_sold_out():
+        client = app.test_client()
+        statuses = []
+        start.wait()
+        while True:
+            response = client.post("/sales", json={
+                "product_id": product_id, "quantity_sold": 1, "total_price": 1.0,
+                "payment_method": "cash", "sale_status": "completed",
+            })
+            statuses.append(response.status_code)
+            if response.status_code != 201:
+                assert response.get_json()["error"] == "Insufficient stock", response.get_json()
+                return statuses
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(lambda _: sell_until_sold_out(), range(THREADS)))
+
+    statuses = [status for result in results for status in result]
+    assert statuses.count(201) == STOCK
+    assert statuses.count(400) == THREADS
+
+    with app.app_context():
+        assert db.session.scalar(db.select(Product.stock_quantity).where(Product.id == product_id)) == 0
+        assert db.session.scalar(
+            db.select(db.func.count(Sale.id)).where(Sale.product_id == product_id)
+        ) == STOCK
@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+
+from throttle import LoginThrottle, TokenBucketLimiter, login_throttle
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def throttle(clock):
+    """A LoginThrottle on the fake clock: 2 attempts per username and 3 per IP, refilled at 6 per minute"""
+    throttle = LoginThrottle()
+    throttle.users = TokenBucketLimiter(2, 6, clock=clock)
+    throttle.ips = TokenBucketLimiter(3, 6, clock=clock)
+    return throttle
+
+
+def test_bucket_refills_at_the_configured_rate(clock):
+    limiter = TokenBucketLimiter(capacity=2, per_minute=60, clock=clock)
+    assert limiter.hit("k") == 0
+    assert limiter.hit("k") == 0
+    assert limiter.hit("k") == pytest.approx(1.0)
+
+    clock.advance(0.5)
+    assert limiter.hit("k") == pytest.approx(0.5)  # A refused attempt spends nothing
+    clock.advance(0.5)
+    assert limiter.hit("k") == 0
+    assert limiter.hit("k") == pytest.approx(1.0)
+
+
+def test_bucket_never_refills_past_capacity(clock):
+    limiter = TokenBucketLimiter(capacity=2, per_minute=60, clock=clock)
+    limiter.hit("k")
+    clock.advance(3600)
+    assert [limiter.hit("k") for _ in range(3)] == [0, 0, pytest.approx(1.0)]
+
+
+def test_retry_after_rounds_up_to_whole_seconds(throttle, clock):
+    assert throttle.retry_after("alice", "10.0.0.1") == 0
+    assert throttle.retry_after("alice", "10.0.0.1") == 0
+    assert throttle.retry_after("alice", "10.0.0.1") == 10  # One token every 10 s
+    clock.advance(0.5)
+    assert throttle.retry_after("alice", "10.0.0.1") == 10  # 9.5 s left rounds up, never down to 9
+    clock.advance(9.4)
+    assert throttle.retry_after("alice", "10.0.0.1") == 1  # 0.1 s left still asks for a whole second
+
+
+def test_ip_limit_applies_before_username_limit(throttle):
+    for username in ("a", "b", "c"):
+        assert throttle.retry_after(username, "10.0.0.1") == 0
+    assert throttle.retry_after("victim", "10.0.0.1") > 0
+
+    # The refused attempt didn't spend the username's tokens, so the real user still gets in
+    assert throttle.retry_after("victim", "10.0.0.2") == 0
+    assert throttle.retry_after("victim", "10.0.0.2") == 0
+
+
+def test_least_recently_seen_key_is_evicted_at_max_keys(clock):
+    limiter = TokenBucketLimiter(capacity=1, per_minute=1, max_keys=2, clock=clock)
+    limiter.hit("a")
+    limiter.hit("b")
+    assert limiter.hit("a") > 0  # Touching "a" makes "b" the least recently seen key
+    limiter.hit("c")
+
+    assert list(limiter._buckets) == ["a", "c"]
+    assert limiter.hit("b") == 0  # Dropped state starts again with a full bucket
+    assert limiter.hit("a") == 0  # ...and "b" coming back pushed "a" out
+
+
+@pytest.fixture
+def login_slots(monkeypatch, throttle):
+    """Route /admin/login through the fake-clock throttle with a single password-check slot"""
+    monkeypatch.setattr(login_throttle, "users", throttle.users)
+    monkeypatch.setattr(login_throttle, "ips", throttle.ips)
+    monkeypatch.setattr(login_throttle, "slots", threading.BoundedSemaphore(1))
+    return login_throttle.slots
+
+
+def test_login_is_refused_with_429_while_every_slot_is_busy(client, login_slots):
+    assert login_slots.acquire(blocking=False)  # Another login is checking its password
+    try:
+        response = client.post("/admin/login", json={"username": "admin", "password": "wrong"})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+    finally:
+        login_slots.release()
+
+    response = client.post("/admin/login", json={"username": "admin", "password": "wrong"})
+    assert response.status_code == 401
+    assert login_slots.acquire(blocking=False)  # The handler gave its slot back
+    login_slots.release()
+
+
+def test_login_rate_limit_sends_retry_after(client, login_slots, clock):
+    for _ in range(2):
+        assert client.post("/admin/login", json={"username": "admin", "password": "wrong"}).status_code == 401
+    clock.advance(2.5)
+
+    response = client.post("/admin/login", json={"username": "admin", "password": "wrong"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "8"
+    assert response.get_json()["retry_after"] == 8
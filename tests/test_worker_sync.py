@@ -0,0 +1,102 @@
+"""Worker sync over a real message queue: N Socket.IO servers sharing a Kombu filesystem queue
+
+Each simulated worker has its own server, client manager, WorkerSync and its
+own catalog cache, low-stock tracker and best-seller counters, as separate
+processes would.
+"""
+from collections import Counter
+import time
+
+import pytest
+
+pytest.importorskip("kombu")
+
+import socketio as python_socketio
+
+from auth import UserCache
+from best_sellers import BestSellerEngine
+from catalog_cache import CatalogCache
+from realtime import queue_manager
+from stock import LowStockTracker
+from worker_sync import WorkerSync
+
+WORKERS = 3
+
+
+def eventually(predicate, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "worker sync message was not delivered in time"
+        time.sleep(0.05)
+
+
+class Worker:
+    def __init__(self, queue_folder):
+        self.sync = WorkerSync()
+        self.ready = False
+        self.received = Counter()
+        self.sync.register("ready", lambda payload: setattr(self, "ready", True))
+        self.sync.register("probe", lambda payload: self.received.update([payload]))
+        self.catalog_cache = CatalogCache(sync=self.sync)
+        self.low_stock = LowStockTracker(sync=self.sync)
+        self.best_sellers = BestSellerEngine(sync=self.sync)
+        self.user_cache = UserCache(sync=self.sync)
+
+        manager = queue_manager("filesystem://", "worker-sync-test", str(queue_folder))
+        self.server = python_socketio.Server(async_mode="threading", client_manager=manager)
+        self.sync.attach(self.server)
+
+
+@pytest.fixture
+def workers(tmp_path):
+    workers = [Worker(tmp_path) for _ in range(WORKERS)]
+    # A fanout queue only receives messages once its listener is bound; wait for all of them
+    eventually(lambda: all(worker.ready for worker in workers) or workers[0].sync.publish("ready", None))
+    return workers
+
+
+def test_every_publish_reaches_every_worker_once(workers):
+    for i, worker in enumerate(workers):
+        worker.sync.publish("probe", i)
+
+    expected = Counter(range(WORKERS))
+    eventually(lambda: all(worker.received == expected for worker in workers))
+    time.sleep(0.5)  # Duplicates would show up by now
+    assert all(worker.received == expected for worker in workers)
+
+
+def test_catalog_bump_invalidates_every_worker(workers):
+    for worker in workers:
+        worker.catalog_cache.put("/products", worker.catalog_cache.version, (b"[]", "etag"))
+
+    workers[1].catalog_cache.bump()
+
+    eventually(lambda: all(worker.catalog_cache.get("/products") is None for worker in workers))
+    assert all(worker.catalog_cache.version == 1 for worker in workers)
+
+
+def test_low_stock_crossing_alerts_once_across_workers(workers):
+    assert workers[0].low_stock.update(7, 2, 10) is True
+    eventually(lambda: all(7 in worker.low_stock.low for worker in workers))
+    assert workers[2].low_stock.update(7, 1, 10) is False
+
+    workers[1].low_stock.update(7, 50, 10)  # Restocked on another worker re-arms everyone
+    eventually(lambda: all(7 not in worker.low_stock.low for worker in workers))
+    assert workers[2].low_stock.update(7, 3, 10) is True
+
+
+def test_best_seller_sales_are_counted_on_every_worker(workers):
+    workers[0].best_sellers.record(42, 3, 30.0, "Glass beads")
+    workers[2].best_sellers.record(42, 2, 20.0, "Glass beads")
+
+    expected = [{"product_id": 42, "name": "Glass beads", "units": 5, "revenue": 50.0}]
+    eventually(lambda: all(worker.best_sellers.top("hour") == expected for worker in workers))
+
+
+def test_user_invalidation_reaches_every_worker(workers):
+    for worker in workers:
+        worker.user_cache._entries["bob"] = (("bob", "admin"), time.monotonic() + 60)
+
+    workers[1].user_cache.invalidate("bob")  # e.g. bob was demoted on worker 1
+
+    eventually(lambda: all("bob" not in worker.user_cache._entries for worker in workers))
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+import math
+import threading
+import time
+
+DEFAULT_MAX_KEYS = 10000
+
+
+class TokenBucketLimiter:
+    """Token buckets per key (username, IP, ...) kept in a fixed-size LRU
+
+    Each key may spend up to `capacity` attempts at once and earns them back
+    at `per_minute`. State for the least recently seen keys is dropped once
+    `max_keys` is reached, so memory stays bounded however many keys an
+    attacker invents; a dropped key simply starts again with a full bucket.
+    `clock` is injectable so the refill arithmetic can be driven by a fake clock.
+    """
+
+    def __init__(self, capacity, per_minute, max_keys=DEFAULT_MAX_KEYS, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()  # key -> (tokens, last refill time)
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """Spend one token from `key`'s bucket
+
+        Returns 0 when the attempt is allowed, otherwise the number of seconds
+        until the bucket holds a whole token again (nothing is spent then).
+        """
+        with self._lock:
+            now = self.clock()
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            self._buckets[key] = (tokens if wait else tokens - 1, now)  # Re-inserted as most recently used
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class LoginThrottle:
+    """Rate limits and a concurrency cap for password verification
+
+    Attempts are limited per username and per client IP (token buckets), and
+    at most LOGIN_MAX_CONCURRENT bcrypt checks run at once on this worker; both
+    answer with a Retry-After in seconds instead of queueing more CPU work.
+    Configured from the app with init_app().
+    """
+
+    def __init__(self):
+        self.users = TokenBucketLimiter(capacity=5, per_minute=5)
+        self.ips = TokenBucketLimiter(capacity=20, per_minute=20)
+        self.slots = threading.BoundedSemaphore(8)
+
+    def init_app(self, app):
+        max_keys = app.config.get("LOGIN_THROTTLE_MAX_KEYS", DEFAULT_MAX_KEYS)
+        self.users = TokenBucketLimiter(
+            app.config.get("LOGIN_USER_BURST", 5), app.config.get("LOGIN_USER_PER_MINUTE", 5), max_keys
+        )
+        self.ips = TokenBucketLimiter(
+            app.config.get("LOGIN_IP_BURST", 20), app.config.get("LOGIN_IP_PER_MINUTE", 20), max_keys
+        )
+        self.slots = threading.BoundedSemaphore(app.config.get("LOGIN_MAX_CONCURRENT", 8))
+
+    def retry_after(self, username, ip):
+        """0 if this attempt may go ahead, else whole seconds to wait (for the Retry-After header)"""
+        # The IP is checked first, so an IP that is over its limit doesn't also drain the username's bucket
+        wait = self.ips.hit(f"ip:{ip}")
+        if not wait:
+            wait = self.users.hit(f"user:{username}")
+        return math.ceil(wait)
+
+    def try_acquire_slot(self):
+        """Reserve one concurrent password check without waiting; release_slot() when done"""
+        return self.slots.acquire(blocking=False)
+
+    def release_slot(self):
+        self.slots.release()
+
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,72 @@
+from collections import defaultdict
+import threading
+
+# Socket.IO namespace the workers use to talk to each other on the message queue.
+# No client ever connects to it; its emits are routed to WorkerSync instead of sockets.
+WORKER_SYNC_NAMESPACE = "/_worker_sync"
+
+
+class WorkerSync:
+    """Replicates in-process state changes (caches, trackers, counters) to every worker
+
+    Components register a handler per kind of change and call publish()
+    instead of changing their state directly. Without a message queue the
+    handlers simply run in this process. Once attach()ed to a Socket.IO
+    server whose client manager is a queue (see realtime.queue_manager), a
+    publish runs the handlers here at once and on every other worker as soon
+    as they read it off the queue, so those workers converge within one
+    queue round trip.
+    """
+
+    def __init__(self):
+        self.manager = None
+        self._handlers = defaultdict(list)  # kind -> [handler(payload)]
+        self._lock = threading.Lock()
+
+    def register(self, kind, handler):
+        with self._lock:
+            self._handlers[kind].append(handler)
+
+    def dispatch(self, kind, payload):
+        """Apply a change in this process (called for our own and other workers' publishes)"""
+        with self._lock:
+            handlers = list(self._handlers.get(kind, ()))
+        for handler in handlers:
+            handler(payload)
+
+    def publish(self, kind, payload):
+        if self.manager is None:
+            self.dispatch(kind, payload)
+            return
+        # The manager handles the emit locally (-> dispatch) and then queues it for the other workers
+        self.manager.emit(kind, payload, namespace=WORKER_SYNC_NAMESPACE)
+
+    def attach(self, server):
+        """Route `server`'s queue messages for WORKER_SYNC_NAMESPACE to this instance
+
+        The manager normally starts listening on the first client connection;
+        it is started here so a worker without sockets still receives changes.
+        """
+        self.manager = server.manager
+        self.manager.worker_sync = self
+        if not server.manager_initialized:
+            server.manager_initialized = True
+            try:
+                server.manager.initialize()
+            except RuntimeError as e:  # e.g. Kombu in gevent mode without monkey patching (flask CLI commands)
+                print(f"❌ Worker sync is not listening: {str(e)}")
+
+
+class WorkerSyncMixin:
+    """For PubSubManager subclasses: deliver WORKER_SYNC_NAMESPACE emits to the attached WorkerSync"""
+
+    worker_sync = None
+
+    def _handle_emit(self, message):
+        if message.get("namespace") != WORKER_SYNC_NAMESPACE:
+            return super()._handle_emit(message)
+        if self.worker_sync is not None:
+            self.worker_sync.dispatch(message["event"], message["data"])
+
+
+worker_sync = WorkerSync()